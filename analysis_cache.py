@@ -0,0 +1,62 @@
+# analysis_cache.py - Cache LRU des prétraitements d'analyse, indexé par version des données
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def data_version(df):
+    """Empreinte des données: (nombre de lignes, id max) ou, à défaut, hash du contenu"""
+    if 'id' in df.columns and len(df) and df['id'].notna().all():
+        return f"{len(df)}-{int(df['id'].max())}"
+    return f"{len(df)}-{int(pd.util.hash_pandas_object(df, index=False).sum()) & 0xFFFFFFFFFFFFFFFF:x}"
+
+
+class LRUCache:
+    """Dictionnaire borné: l'entrée la moins récemment utilisée est évincée"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Retourne la valeur en cache ou la calcule (sans verrou pendant le calcul)"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Résultats partagés par toutes les sessions: ne jamais les modifier en place
+ANALYSIS_CACHE = LRUCache(maxsize=8)
@@ -0,0 +1,36 @@
+# analysis_tasks.py - Calculs d'analyse sans interface, exécutables dans un processus de travail
+import numpy as np
+
+from chart_data import histogram
+from clustering import cluster
+from feature_importance import FAST, IMPURITY, feature_importance
+
+HISTOGRAM_COLUMNS = 4
+
+
+def eda_summary(df):
+    """Statistiques et histogrammes pré-calculés de l'analyse exploratoire"""
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    histograms = {}
+    for col in numeric_cols[:HISTOGRAM_COLUMNS]:
+        # Compartiments calculés ici: seuls ~30 comptes par colonne partent vers le navigateur
+        hist = histogram(df[col].dropna().to_numpy())
+        if hist is not None:
+            histograms[col] = hist
+
+    return {
+        'shape': df.shape,
+        'missing': int(df.isnull().sum().sum()),
+        'numeric_columns': len(numeric_cols),
+        'head': df.head(),
+        'describe': df.describe(),
+        'histograms': histograms,
+    }
+
+
+def clustering_task(X_scaled, n_clusters, features_version=None, n_jobs=1):
+    return cluster(X_scaled, n_clusters, data_version=features_version, n_jobs=n_jobs)
+
+
+def feature_importance_task(X, y, mode=FAST, method=IMPURITY, features_version=None, n_jobs=1):
+    return feature_importance(X, y, mode, method, data_version=features_version, n_jobs=n_jobs)
@@ -0,0 +1,180 @@
+# api.py - API REST/JSON de scoring, servie par gunicorn (gunicorn -c gunicorn.conf.py api:app)
+import hmac
+import json
+import math
+import os
+import threading
+from datetime import date
+
+from flask import Flask, jsonify, request
+
+from connection_manager import ConnectionManager
+from data_access import PAGE_SIZE, count_patients, fetch_patients_after, fetch_patients_page
+from inference import FEATURE_COLUMNS, ValidationError, get_engine, score_patients
+from write_queue import PatientWriteQueue, orphan_journals, rejected_journal_path, worker_journal_path
+
+MAX_BATCH = int(os.environ.get("TB_API_MAX_BATCH", 1000))
+MAX_PAGE_SIZE = 500
+DEFAULT_MEDECIN = "API"
+# Routes renvoyant des données personnelles: refusées tant qu'aucun jeton n'est configuré
+# (de même que /predict?save=1, qui écrit dans patients)
+PROTECTED_ENDPOINTS = {'patients'}
+# Champs enregistrés par ?save=1: longueur maximale des textes (schéma patients) et mesures
+TEXT_FIELDS = {'cin': 20, 'nom': 100, 'prenom': 100, 'medecin_traitant': 100}
+MEASURE_FIELDS = ['poids', 'taille', 'imc']
+
+# Chargé à l'import: avec preload_app, le modèle est lu une seule fois par le
+# processus maître puis partagé par les workers après le fork
+INFERENCE_ENGINE = get_engine()
+
+
+# =============================================================================
+# 🔹 ENREGISTREMENT
+# =============================================================================
+def patient_record(i, patient, result):
+    """Ligne de la table patients d'un patient scoré; ValidationError si un champ enregistré est invalide"""
+    record = {col: patient[col] for col in FEATURE_COLUMNS}
+    for field, length in TEXT_FIELDS.items():
+        value = patient.get(field, DEFAULT_MEDECIN if field == 'medecin_traitant' else None)
+        if value is not None and (not isinstance(value, str) or len(value) > length):
+            raise ValidationError(f"patient {i}: '{field}' doit être un texte d'au plus {length} caractères")
+        record[field] = value
+    for field in MEASURE_FIELDS:
+        value = patient.get(field)
+        if value is not None:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = math.nan
+            if not math.isfinite(value):
+                raise ValidationError(f"patient {i}: '{field}' doit être un nombre fini")
+        record[field] = value
+    try:
+        record['date_consultation'] = date.fromisoformat(patient.get('date_consultation',
+                                                                     date.today().isoformat())).isoformat()
+    except (TypeError, ValueError):
+        raise ValidationError(f"patient {i}: 'date_consultation' doit être une date AAAA-MM-JJ")
+    return {**record, **result}
+
+
+def save_requested():
+    return request.args.get("save") in ("1", "true")
+
+
+# =============================================================================
+# 🔹 APPLICATION
+# =============================================================================
+def create_app(connection_manager=None, write_queue=None, token=None):
+    """Application Flask; la base et la file d'écriture sont créées au premier appel, après le fork"""
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+    token = token if token is not None else os.environ.get("TB_API_TOKEN")
+    services = {'manager': connection_manager, 'queue': write_queue}
+    # gunicorn lance plusieurs threads par worker: un seul construit chaque service
+    services_lock = threading.RLock()
+
+    def manager():
+        if services['manager'] is None:
+            with services_lock:
+                if services['manager'] is None:
+                    services['manager'] = ConnectionManager.from_env()
+        return services['manager']
+
+    def engine():
+        db = manager().engine
+        if db is None:
+            raise RuntimeError("aucune base de données disponible")
+        return db
+
+    def queue():
+        if services['queue'] is None:
+            with services_lock:
+                if services['queue'] is None:
+                    # Un journal par worker (rejets communs); ceux des workers arrêtés sont repris ici
+                    write_queue = PatientWriteQueue(lambda: manager().engine, journal_path=worker_journal_path(),
+                                                    rejected_path=rejected_journal_path())
+                    for path in orphan_journals():
+                        write_queue.adopt_journal(path)
+                    services['queue'] = write_queue
+        return services['queue']
+
+    @app.before_request
+    def check_token():
+        # Authorization: Bearer <TB_API_TOKEN>; sans jeton configuré, seul le scoring reste ouvert
+        if request.endpoint == 'health':
+            return None
+        if not token:
+            if request.endpoint in PROTECTED_ENDPOINTS or (request.endpoint == 'predict' and save_requested()):
+                return jsonify(error="TB_API_TOKEN non configuré: accès aux patients désactivé"), 401
+            return None
+        sent = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(sent.encode(), token.encode()):
+            return jsonify(error="jeton invalide"), 401
+
+    @app.errorhandler(ValidationError)
+    def validation_error(e):
+        return jsonify(error=str(e)), 400
+
+    @app.errorhandler(RuntimeError)
+    def unavailable(e):
+        return jsonify(error=str(e)), 503
+
+    @app.get("/health")
+    def health():
+        status = services['manager'].status() if services['manager'] is not None else None
+        return jsonify(status="ok", model=INFERENCE_ENGINE.source, model_error=INFERENCE_ENGINE.load_error,
+                       database=status)
+
+    @app.post("/predict")
+    def predict():
+        """Un patient (objet) ou un lot (tableau); ?save=1 enregistre les patients scorés"""
+        payload = request.get_json(silent=True)
+        single = isinstance(payload, dict)
+        patients = [payload] if single else payload
+        if not isinstance(patients, list) or not patients:
+            raise ValidationError("objet patient ou tableau non vide attendu")
+        if len(patients) > MAX_BATCH:
+            raise ValidationError(f"au plus {MAX_BATCH} patients par requête")
+
+        results = score_patients(patients, INFERENCE_ENGINE)
+        if save_requested():
+            # Tout le lot est vérifié avant d'enregistrer le premier patient
+            records = [patient_record(i, patient, result) for i, (patient, result) in enumerate(zip(patients, results))]
+            engine()  # 503 plutôt qu'un journal local si aucune base n'est configurée
+            for record in records:
+                queue().submit(record)
+        return jsonify(results[0] if single else results)
+
+    @app.get("/patients")
+    def patients():
+        """Page ?page=&page_size= (OFFSET) ou ?after_id=&page_size= (pagination par clé)"""
+        try:
+            page_size = min(MAX_PAGE_SIZE, max(1, int(request.args.get("page_size", PAGE_SIZE))))
+            page = max(0, int(request.args.get("page", 0)))
+            after_id = request.args.get("after_id")
+            after_id = None if after_id is None else int(after_id)
+        except ValueError:
+            raise ValidationError("page, page_size et after_id doivent être des entiers")
+
+        db = engine()
+        if after_id is not None:
+            df = fetch_patients_after(db, after_id, page_size)
+        else:
+            df = fetch_patients_page(db, page, page_size)
+        rows = json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+        return jsonify(
+            patients=rows,
+            total=count_patients(db),
+            page_size=page_size,
+            next_after_id=int(df['id'].iloc[-1]) if len(df) == page_size else None,
+        )
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    # Serveur de développement (un seul processus)
+    app.run(host="127.0.0.1", port=int(os.environ.get("TB_API_PORT", 8000)))
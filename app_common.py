@@ -0,0 +1,186 @@
+# app_common.py - Socle léger de l'application: style, session utilisateur, connexion à la base
+# (aucune bibliothèque lourde ici: ce module est chargé dès l'écran de connexion)
+import streamlit as st
+
+# =============================================================================
+# 🎨 STYLE CSS PERSONNALISÉ
+# =============================================================================
+def inject_custom_css():
+    st.markdown("""
+    <style>
+    /* Style général */
+    .main {
+        background-color: #f8f9fa;
+    }
+    
+    /* En-têtes avec dégradé */
+    .main-header {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        padding: 2rem;
+        border-radius: 10px;
+        margin-bottom: 2rem;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    }
+    
+    /* Cartes avec ombres */
+    .custom-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+        border-left: 4px solid #667eea;
+        margin-bottom: 1rem;
+    }
+    
+    /* Boutons stylisés */
+    .stButton>button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+        padding: 0.5rem 1rem;
+        border-radius: 5px;
+        font-weight: 500;
+        transition: all 0.3s ease;
+    }
+    
+    .stButton>button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
+    }
+    
+    /* Sidebar stylisée */
+    .css-1d391kg {
+        background: linear-gradient(180deg, #2c3e50 0%, #3498db 100%);
+    }
+    
+    /* Métriques améliorées */
+    .stMetric {
+        background: white;
+        padding: 1rem;
+        border-radius: 10px;
+        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+    }
+    
+    /* Onglets personnalisés */
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 2rem;
+    }
+    
+    .stTabs [data-baseweb="tab"] {
+        background-color: #f1f3f4;
+        border-radius: 5px 5px 0px 0px;
+        padding: 0.5rem 1rem;
+        font-weight: 500;
+    }
+    
+    /* Inputs stylisés */
+    .stTextInput>div>div>input, .stNumberInput>div>div>input, .stSelectbox>div>div>select {
+        border: 2px solid #e0e0e0;
+        border-radius: 5px;
+        padding: 0.5rem;
+    }
+    
+    /* Barre de progression */
+    .stProgress > div > div > div > div {
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+    }
+    
+    /* Alertes personnalisées */
+    .stAlert {
+        border-radius: 10px;
+        border-left: 4px solid;
+    }
+    
+    /* Séparateurs */
+    .custom-divider {
+        height: 3px;
+        background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
+        margin: 2rem 0;
+        border-radius: 2px;
+    }
+    
+    /* Badges */
+    .risk-badge {
+        padding: 0.5rem 1rem;
+        border-radius: 20px;
+        font-weight: bold;
+        text-align: center;
+    }
+    
+    .risk-low { background-color: #d4edda; color: #155724; }
+    .risk-medium { background-color: #fff3cd; color: #856404; }
+    .risk-high { background-color: #f8d7da; color: #721c24; }
+    </style>
+    """, unsafe_allow_html=True)
+
+# =============================================================================
+# 🔹 SYSTÈME D'AUTHENTIFICATION AMÉLIORÉ
+# =============================================================================
+@st.cache_resource
+def get_user_store():
+    """Comptes stockés dans la base active (table users)"""
+    from user_store import UserStore
+    return UserStore(lambda: get_connection_manager().engine)
+
+def init_auth():
+    if 'logged_in' not in st.session_state:
+        st.session_state.logged_in = False
+    if 'current_user' not in st.session_state:
+        st.session_state.current_user = None
+    if 'user' not in st.session_state:
+        st.session_state.user = None
+
+def current_user():
+    """Profil (username, role, name) de l'utilisateur connecté"""
+    return st.session_state.user
+
+def session_id():
+    """Identifiant court de la session navigateur (mesures de latence par session)"""
+    if 'perf_session' not in st.session_state:
+        import uuid
+        st.session_state.perf_session = uuid.uuid4().hex[:8]
+    return st.session_state.perf_session
+
+@st.cache_resource
+def get_metrics_server():
+    """Export Prometheus /metrics sur TB_METRICS_PORT (un seul serveur par processus)"""
+    from instrumentation import start_metrics_server
+    return start_metrics_server()
+
+# =============================================================================
+# 🔹 BASE DE DONNÉES - OPTIONS MULTIPLES
+# =============================================================================
+@st.cache_resource
+def get_connection_manager():
+    """Pool de connexions et contrôle de santé partagés par tout le processus"""
+    from connection_manager import ConnectionManager
+    return ConnectionManager.from_env(on_switch=on_backend_switch)
+
+def on_backend_switch(engine):
+    """Les ids et les résultats en cache dépendent de la base active"""
+    from app_data import get_patient_cache, invalidate_patient_cache
+    get_patient_cache().reset()
+    invalidate_patient_cache()
+
+def get_db_connection():
+    """
+    Retourne la base active du gestionnaire de connexions
+    Priorité: MySQL -> SQLite -> Données simulées
+    """
+    manager = get_connection_manager()
+    status = manager.status()
+    
+    if status['backend'] == 'mysql':
+        st.sidebar.success("✅ Connecté à MySQL")
+        if status['sync_error']:
+            st.sidebar.warning(f"⚠️ Recopie des patients SQLite dans MySQL en échec: {status['sync_error']}")
+    elif status['backend'] == 'sqlite':
+        st.sidebar.warning(f"❌ MySQL non disponible: {status['mysql_error']}")
+        st.sidebar.success("✅ Connecté à SQLite")
+        pending = manager.fallback_pending()
+        if pending:
+            st.sidebar.caption(f"🔁 {pending} patient(s) à recopier dans MySQL à son retour")
+    else:
+        st.sidebar.error(f"❌ SQLite échoué: {status['sqlite_error']}")
+    return manager.engine
@@ -0,0 +1,214 @@
+# app_data.py - Données patients et modèle partagés par les pages (caches Streamlit)
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from app_common import get_connection_manager
+from daily_stats import daily_stats, rebuild_daily_stats
+from dashboard_aggregations import age_histogram, dashboard_stats_from_frame, date_bounds, kpi_summary
+from data_access import CACHE_TTL, PAGE_SIZE, IncrementalPatientCache, count_patients, fetch_patients_page
+from inference import features_matrix, get_engine
+from instrumentation import RECORDER, timed
+from patient_schema import compact_patients
+from patient_search import search_patients
+from patient_snapshot import PatientSnapshot
+from write_queue import PatientWriteQueue
+
+def create_sample_data():
+    """Crée des données d'exemple réalistes pour la démonstration"""
+    sample_data = {
+        'id': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+        'cin': ['AB123456', 'CD789012', 'EF345678', 'GH901234', 'IJ567890',
+                'KL123456', 'MN789012', 'OP345678', 'QR901234', 'ST567890'],
+        'nom': ['DUPONT', 'MARTIN', 'BERNARD', 'PETIT', 'ROBERT', 
+                'RICHARD', 'DURAND', 'DUBOIS', 'MOREAU', 'LAURENT'],
+        'prenom': ['Jean', 'Marie', 'Pierre', 'Sophie', 'Paul', 
+                  'Nathalie', 'Michel', 'Catherine', 'Philippe', 'Isabelle'],
+        'age': [35, 42, 28, 55, 67, 31, 45, 38, 52, 29],
+        'genre': ['Homme', 'Femme', 'Homme', 'Femme', 'Homme', 
+                 'Femme', 'Homme', 'Femme', 'Homme', 'Femme'],
+        'poids': [70.0, 65.0, 80.0, 60.0, 75.0, 58.0, 85.0, 62.0, 78.0, 55.0],
+        'taille': [170.0, 165.0, 175.0, 160.0, 172.0, 163.0, 178.0, 166.0, 174.0, 162.0],
+        'imc': [24.2, 23.9, 26.1, 23.4, 25.4, 21.8, 26.8, 22.5, 25.8, 21.0],
+        'douleur_thoracique': ['Légère', 'Aucune', 'Modérée', 'Sévère', 'Modérée', 
+                              'Légère', 'Aucune', 'Modérée', 'Sévère', 'Légère'],
+        'intensite_toux': [3, 7, 5, 9, 6, 2, 8, 4, 7, 3],
+        'essoufflement': [2, 6, 4, 8, 5, 1, 7, 3, 6, 2],
+        'production_crachats': ['Faible', 'Moyenne', 'Faible', 'Importante', 'Moyenne', 
+                               'Aucune', 'Importante', 'Faible', 'Moyenne', 'Aucune'],
+        'sang_crachats': ['Non', 'Oui', 'Non', 'Abondant', 'Oui', 
+                         'Non', 'Abondant', 'Non', 'Oui', 'Non'],
+        'fievre': ['<38°C', '38-39°C', 'Absente', '>39°C', '38-39°C', 
+                  'Absente', '>39°C', '<38°C', '38-39°C', 'Absente'],
+        'fatigue': [4, 8, 3, 9, 7, 2, 8, 5, 6, 3],
+        'sueurs_nocturnes': ['Occasionnelles', 'Fréquentes', 'Non', 'Très fréquentes', 'Fréquentes', 
+                            'Non', 'Très fréquentes', 'Occasionnelles', 'Fréquentes', 'Non'],
+        'perte_poids': [1.5, 3.2, 0.5, 4.5, 2.8, 0.2, 5.1, 1.2, 3.5, 0.8],
+        'tabagisme': ['<10/jour', 'Ancien fumeur', 'Jamais fumé', '>10/jour', 'Ancien fumeur',
+                     'Jamais fumé', '>10/jour', '<10/jour', 'Ancien fumeur', 'Jamais fumé'],
+        'antecedents_tb': ['Non', 'Oui, traité', 'Non', 'Oui, récurrent', 'Oui, traité',
+                          'Non', 'Oui, récurrent', 'Non', 'Oui, traité', 'Non'],
+        'prediction': [0, 1, 0, 1, 1, 0, 1, 0, 1, 0],
+        'probabilite': [0.25, 0.78, 0.32, 0.85, 0.72, 0.18, 0.91, 0.28, 0.68, 0.22],
+        'niveau_risque': ['Faible', 'Élevé', 'Faible', 'Élevé', 'Élevé', 
+                         'Faible', 'Élevé', 'Faible', 'Modéré', 'Faible'],
+        'medecin_traitant': ['Dr Dupont', 'Dr Martin', 'Dr Bernard', 'Dr Petit', 'Dr Robert',
+                            'Dr Richard', 'Dr Durand', 'Dr Dubois', 'Dr Moreau', 'Dr Laurent'],
+        'date_consultation': [date.today()] * 10
+    }
+    return pd.DataFrame(sample_data)
+
+# =============================================================================
+# 🔹 MODÈLE ML ET PRÉDICTION
+# =============================================================================
+@st.cache_resource
+def get_inference_engine():
+    """Charge le modèle une seule fois par processus (source et repli exportés dans les métriques)"""
+    engine = get_engine()
+    RECORDER.set_info("tb_model_info", {'source': engine.source, 'fallback': str(engine.fallback).lower()})
+    return engine
+
+@timed()
+def predict_tuberculosis(patient_data):
+    """Prédiction ML d'un patient (lot d'une seule ligne)"""
+    try:
+        predictions, probabilities = get_inference_engine().predict(features_matrix([patient_data]))
+        return int(predictions[0]), float(probabilities[0])
+        
+    except Exception as e:
+        st.error(f"Erreur prédiction: {e}")
+        return 0, 0.0
+
+def calculate_risk_level(probability):
+    if probability < 0.3:
+        return "Faible", "green", "🟢"
+    elif probability < 0.7:
+        return "Modéré", "orange", "🟡"
+    else:
+        return "Élevé", "red", "🔴"
+
+# =============================================================================
+# 🔹 FONCTIONS DE GESTION DE LA BASE DE DONNÉES
+# =============================================================================
+@st.cache_resource
+def get_patient_cache():
+    """Cache incrémental partagé par toutes les sessions"""
+    return IncrementalPatientCache(ttl=CACHE_TTL)
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_patient_count(_engine):
+    return count_patients(_engine)
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_patients_page(_engine, page, page_size=PAGE_SIZE):
+    return fetch_patients_page(_engine, page, page_size)
+
+@st.cache_resource
+def get_patient_snapshot():
+    """Instantané colonne (Arrow, memory-map) partagé par les vues analytiques"""
+    return PatientSnapshot()
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_date_bounds(_engine):
+    return date_bounds(_engine)
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_dashboard_stats(_engine, start=None, end=None):
+    """KPI et tranches d'âge calculés en SQL (parcours par plage de l'index date_consultation)"""
+    return {'kpis': kpi_summary(_engine, start, end), 'age': age_histogram(_engine, start=start, end=end)}
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_frame_stats(_df, version, start=None, end=None):
+    """Mêmes agrégats sur les données de session (mode sans base)"""
+    return dashboard_stats_from_frame(_df, start=start, end=end)
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_daily_stats(_engine, start=None, end=None):
+    return daily_stats(_engine, start, end)
+
+@st.cache_data(ttl=CACHE_TTL)
+def cached_search(_engine, term, page):
+    return search_patients(_engine, term, page)
+
+def invalidate_patient_cache():
+    """Invalide les résultats en cache après une écriture dans la table patients"""
+    cached_patient_count.clear()
+    cached_patients_page.clear()
+    cached_date_bounds.clear()
+    cached_dashboard_stats.clear()
+    cached_frame_stats.clear()
+    cached_daily_stats.clear()
+    cached_search.clear()
+    get_patient_cache().invalidate()
+    get_patient_snapshot().invalidate()
+
+@st.cache_resource
+def get_write_queue():
+    """File d'écriture groupée partagée par toutes les sessions (suit la base active)"""
+    return PatientWriteQueue(lambda: get_connection_manager().engine, on_flush=invalidate_patient_cache)
+
+@timed()
+def save_patient_data(engine, patient_data):
+    """Sauvegarde les données du patient dans la base (écriture groupée en arrière-plan)"""
+    try:
+        if engine:
+            get_write_queue().submit(patient_data)
+            return True
+        else:
+            # Si pas de base de données, sauvegarde en session
+            if 'patients' not in st.session_state:
+                st.session_state.patients = []
+            st.session_state.patients.append(patient_data)
+            return True
+    except Exception as e:
+        st.error(f"❌ Erreur sauvegarde: {e}")
+        return False
+
+@timed()
+def load_patient_data(engine):
+    """Charge les données des patients (seules les nouvelles lignes sont lues)"""
+    try:
+        if engine:
+            # Le schéma est créé par les migrations de get_db_connection
+            try:
+                if cached_patient_count(engine) == 0:
+                    # Table vide, créer des données d'exemple
+                    sample_df = create_sample_data().drop(columns=['id'])
+                    with engine.begin() as conn:
+                        sample_df.to_sql("patients", con=conn, if_exists="append", index=False)
+                        rebuild_daily_stats(conn)
+                    invalidate_patient_cache()
+                return get_patient_cache().get(engine)
+            except Exception as e:
+                # Table illisible: on n'écrase jamais le schéma, données de démonstration
+                st.sidebar.warning(f"Table patients non disponible: {e}")
+                return compact_patients(create_sample_data())
+        
+        # Si pas de base de données, utiliser les données de session
+        if 'patients' in st.session_state and st.session_state.patients:
+            return compact_patients(pd.DataFrame(st.session_state.patients))
+        else:
+            # Créer et sauvegarder des données d'exemple
+            sample_df = create_sample_data()
+            if 'patients' not in st.session_state:
+                st.session_state.patients = []
+            st.session_state.patients.extend(sample_df.to_dict('records'))
+            return compact_patients(sample_df)
+            
+    except Exception as e:
+        st.error(f"❌ Erreur chargement données: {e}")
+        # Retourner des données d'exemple en cas d'erreur
+        return compact_patients(create_sample_data())
+
+@timed()
+def load_analytics_data(engine):
+    """Données des vues analytiques: lues dans l'instantané colonne, pas dans la base"""
+    if engine:
+        try:
+            if cached_patient_count(engine) == 0:
+                load_patient_data(engine)  # initialise la table si elle est vide
+            return get_patient_snapshot().get(engine)
+        except Exception as e:
+            st.sidebar.warning(f"Instantané indisponible: {e}")
+    return load_patient_data(engine)
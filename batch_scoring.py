@@ -0,0 +1,201 @@
+# batch_scoring.py - Dépistage par lot de fichiers au format TUBERCULOSE.CSV
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from inference import FEATURE_COLUMNS, MAPPING, get_engine, risk_levels
+from write_queue import insert_patients
+
+DEFAULT_CHUNKSIZE = 10000
+
+# =============================================================================
+# 🔹 CORRESPONDANCE CSV -> FORMULAIRE DE DIAGNOSTIC
+# =============================================================================
+# Modalités du CSV de dépistage traduites vers les libellés du formulaire
+CSV_LABELS = {
+    'Gender': ('genre', 'Genre', {'Male': 'Homme', 'Female': 'Femme'}),
+    'Chest_Pain': ('douleur_thoracique', 'Douleur_Thoracique', {'No': 'Aucune', 'Yes': 'Légère'}),
+    'Fever': ('fievre', 'Fievre', {'Mild': '<38°C', 'Moderate': '38-39°C', 'High': '>39°C'}),
+    'Night_Sweats': ('sueurs_nocturnes', 'Sueurs_Nocturnes', {'No': 'Non', 'Yes': 'Occasionnelles'}),
+    'Sputum_Production': ('production_crachats', 'Production_Crachats',
+                          {'Low': 'Faible', 'Medium': 'Moyenne', 'High': 'Importante'}),
+    'Blood_in_Sputum': ('sang_crachats', 'Sang_Crachats', {'No': 'Non', 'Yes': 'Oui'}),
+    'Smoking_History': ('tabagisme', 'Tabagisme',
+                        {'Never': 'Jamais fumé', 'Former': 'Ancien fumeur', 'Current': '<10/jour'}),
+    'Previous_TB_History': ('antecedents_tb', 'Antecedents_TB', {'No': 'Non', 'Yes': 'Oui, traité'}),
+}
+
+# Colonnes numériques: (colonne formulaire, facteur d'échelle)
+CSV_NUMERIC = {
+    'Age': ('age', 1.0),
+    'Cough_Severity': ('intensite_toux', 1.0),
+    'Breathlessness': ('essoufflement', 2.5),   # échelle 0-4 -> 0-10
+    'Fatigue': ('fatigue', 1.0),
+    'Weight_Loss': ('perte_poids', 1.0),
+}
+
+
+def encode_chunk(chunk):
+    """Retourne (libellés formulaire, matrice FEATURE_COLUMNS) pour un bloc du CSV"""
+    labels = pd.DataFrame(index=chunk.index)
+    codes = {}
+
+    for csv_col, (col, scale) in CSV_NUMERIC.items():
+        values = pd.to_numeric(chunk[csv_col], errors='coerce').to_numpy(dtype=np.float64) * scale
+        labels[col] = values
+        codes[col] = values
+
+    for csv_col, (col, mapping_key, translation) in CSV_LABELS.items():
+        labels[col] = chunk[csv_col].map(translation)
+        codes[col] = labels[col].map(MAPPING[mapping_key]).to_numpy(dtype=np.float64)
+
+    labels = labels[FEATURE_COLUMNS]
+    X = np.column_stack([codes[col] for col in FEATURE_COLUMNS])
+    # Modalités inconnues ou valeurs manquantes: on retient l'absence de symptôme
+    return labels, np.nan_to_num(X, nan=0.0)
+
+
+def score_chunk(chunk, engine, medecin="Dépistage"):
+    """Score un bloc et le met au format de la table patients"""
+    labels, X = encode_chunk(chunk)
+    predictions, probabilities = engine.predict(X)
+
+    scored = labels
+    scored.insert(0, 'cin', chunk['Patient_ID'].astype(str) if 'Patient_ID' in chunk else None)
+    scored['prediction'] = predictions
+    scored['probabilite'] = probabilities
+    scored['niveau_risque'] = risk_levels(probabilities)
+    scored['medecin_traitant'] = medecin
+    scored['date_consultation'] = date.today()
+    return scored
+
+
+# =============================================================================
+# 🔹 SORTIES
+# =============================================================================
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.header = True
+
+    def write(self, scored):
+        scored.to_csv(self.path, mode='w' if self.header else 'a', header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.writer = None
+
+    def write(self, scored):
+        table = self._pa.Table.from_pandas(scored, preserve_index=False)
+        if self.writer is None:
+            self.writer = self._pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class DatabaseSink:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def write(self, scored):
+        # Un bloc = une transaction et un INSERT préparé en executemany
+        rows = scored.astype(object).where(scored.notna(), None).to_dict('records')
+        with self.engine.begin() as conn:
+            insert_patients(conn, rows)
+
+    def close(self):
+        pass
+
+
+def make_sink(output=None, engine=None):
+    """Choisit la sortie selon l'extension du fichier ou la base fournie"""
+    if output is None:
+        if engine is None:
+            raise ValueError("Fournir soit un fichier de sortie soit une base de données")
+        return DatabaseSink(engine)
+    if output.lower().endswith('.parquet'):
+        return ParquetSink(output)
+    return CsvSink(output)
+
+
+# =============================================================================
+# 🔹 DÉPISTAGE PAR LOT
+# =============================================================================
+def score_file(source, sink, chunksize=DEFAULT_CHUNKSIZE, engine=None, medecin="Dépistage",
+               progress=None):
+    """Lit le fichier par blocs, score chaque bloc et l'écrit immédiatement
+
+    Seul un bloc est en mémoire à la fois. `progress(stats)` est appelé après
+    chaque bloc. Retourne les statistiques de débit.
+    """
+    engine = engine or get_engine()
+    stats = {'rows': 0, 'positives': 0, 'chunks': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+    start = time.perf_counter()
+
+    try:
+        for chunk in pd.read_csv(source, chunksize=chunksize):
+            scored = score_chunk(chunk, engine, medecin=medecin)
+            sink.write(scored)
+
+            stats['rows'] += len(scored)
+            stats['positives'] += int(scored['prediction'].sum())
+            stats['chunks'] += 1
+            stats['seconds'] = time.perf_counter() - start
+            stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+            if progress:
+                progress(stats)
+    finally:
+        sink.close()
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dépistage TB par lot d'un fichier au format TUBERCULOSE.CSV")
+    parser.add_argument("input", help="Fichier CSV à scorer")
+    parser.add_argument("-o", "--output", help="Fichier de sortie (.csv ou .parquet)")
+    parser.add_argument("--db", help="URL SQLAlchemy: écrit les résultats dans la table patients")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Lignes lues par bloc")
+    parser.add_argument("--medecin", default="Dépistage", help="Valeur de medecin_traitant")
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.db:
+        parser.error("indiquer --output ou --db")
+
+    db_engine = None
+    if args.db:
+        from sqlalchemy import create_engine
+
+        from migrations import migrate
+        db_engine = create_engine(args.db)
+        migrate(db_engine)  # base neuve: crée la table patients (sous le verrou de schéma)
+    sink = make_sink(args.output, db_engine)
+
+    def report(stats):
+        print(f"\r{stats['rows']} lignes - {stats['rows_per_second']:.0f} lignes/s", end="", flush=True)
+
+    stats = score_file(args.input, sink, chunksize=args.chunksize, medecin=args.medecin, progress=report)
+    print()
+    print(f"✅ {stats['rows']} patients scorés en {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:.0f} lignes/s), {stats['positives']} cas à risque")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+# benchmarks.py - Suite de mesures de performance sur une base SQLite locale de patients synthétiques
+#
+#   python benchmarks.py                          # 1k et 100k patients, historique local benchmark_history.jsonl
+#   python benchmarks.py --sizes 1k 100k 1m --repeat 1
+#   python benchmarks.py --only predict search
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.environ.get("TB_BENCHMARK_HISTORY", os.path.join(BASE_DIR, "benchmark_history.jsonl"))
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+DEFAULT_SIZES = ('1k', '100k')
+REPEAT = 3
+REGRESSION_RATIO = 1.25   # médiane 25 % plus lente que la mesure précédente
+SEARCH_TERM = "DUPONT"
+SAVE_BATCH = 100
+
+
+# =============================================================================
+# 🔹 DONNÉES SYNTHÉTIQUES
+# =============================================================================
+def create_database(path, df):
+    """Base SQLite migrée contenant `df` (table patients, index de recherche et agrégats journaliers)"""
+    from connection_manager import create_sqlite_engine
+    from migrations import migrate
+    from synthetic_data import bulk_load
+
+    engine = create_sqlite_engine(path)
+    migrate(engine)
+    bulk_load(engine, df)
+    return engine
+
+
+# =============================================================================
+# 🔹 MESURES
+# =============================================================================
+def timeit(func, repeat=REPEAT, setup=None):
+    """Durées (s) de `repeat` appels; `setup` est exécuté hors chronomètre avant chaque appel"""
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        func(state) if setup else func()
+        timings.append(time.perf_counter() - started)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'repeat': repeat,
+    }
+
+
+def benchmarks(engine, df):
+    """Cas mesurés: nom -> (fonction, setup éventuel)"""
+    from app_data import predict_tuberculosis
+    from daily_stats import daily_stats
+    from dashboard_aggregations import dashboard_stats, dashboard_stats_from_frame
+    from data_access import IncrementalPatientCache
+    from inference import MAPPING, features_matrix, get_engine
+    from page_analysis import AdvancedDataAnalyzer
+    from patient_search import search_frame, search_patients
+    from write_queue import insert_patients
+
+    # Codes du formulaire pour le modèle, comme diagnostic_page
+    coded = df[['age', 'intensite_toux', 'essoufflement', 'fatigue', 'perte_poids']].copy()
+    for key, codes in MAPPING.items():
+        coded[key.lower()] = df[key.lower()].map(codes)
+    rows = coded.to_dict('records')
+    X = features_matrix(rows)
+    model = get_engine()
+    patients = df.head(SAVE_BATCH).to_dict('records')
+
+    def insert_batch():
+        # Un lot écrit par la file d'écriture (save_patient_data ne fait que mettre en file)
+        with engine.begin() as conn:
+            insert_patients(conn, patients)
+
+    def analyzer():
+        return AdvancedDataAnalyzer(df=df)
+
+    def preprocessed():
+        state = analyzer()
+        state.preprocess_data(target_column='prediction')
+        return state
+
+    return {
+        'predict_single': (lambda: predict_tuberculosis(rows[0]), None),
+        'predict_batch': (lambda: model.predict(X), None),
+        'insert_patients_batch': (insert_batch, None),
+        'load_patient_data_cold': (lambda: IncrementalPatientCache().get(engine), None),
+        'dashboard_stats_frame': (lambda: dashboard_stats_from_frame(df), None),
+        'dashboard_stats_sql': (lambda: dashboard_stats(engine), None),
+        'daily_stats': (lambda: daily_stats(engine), None),
+        'search_sql': (lambda: search_patients(engine, SEARCH_TERM), None),
+        'search_frame': (lambda: search_frame(df, SEARCH_TERM), None),
+        'clean_dataframe': (lambda: analyzer(), None),
+        'preprocess_data': (lambda state: state.preprocess_data(target_column='prediction'), analyzer),
+        'perform_clustering': (lambda state: state.perform_clustering(n_clusters=3), preprocessed),
+        'advanced_feature_analysis': (lambda state: state.advanced_feature_analysis(), preprocessed),
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=REPEAT, only=None, progress=None):
+    """Mesure chaque cas pour chaque taille; retourne {'<cas>@<taille>': statistiques}"""
+    from data_access import IncrementalPatientCache
+    from synthetic_data import fit_profile, generate
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        profile = fit_profile()
+        for label in sizes:
+            n = SIZES[label]
+            started = time.perf_counter()
+            df = generate(n, profile)
+            engine = create_database(os.path.join(directory, f"bench_{label}.db"), df)
+            setup_seconds = time.perf_counter() - started
+            if progress:
+                progress(f"setup@{label}", {'median': setup_seconds})
+
+            # DataFrame typé, tel que servi par le cache patients
+            frame = IncrementalPatientCache().get(engine)
+            for name, (func, setup) in benchmarks(engine, frame).items():
+                if only and not any(token in name for token in only):
+                    continue
+                key = f"{name}@{label}"
+                results[key] = timeit(func, repeat, setup)
+                if progress:
+                    progress(key, results[key])
+            engine.dispose()
+    return results
+
+
+# =============================================================================
+# 🔹 HISTORIQUE
+# =============================================================================
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("+" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(entry, path=HISTORY_PATH):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def compare(results, previous, ratio=REGRESSION_RATIO):
+    """[(cas, médiane précédente, médiane actuelle, rapport)] des cas plus lents que `ratio`"""
+    regressions = []
+    for key, stats in results.items():
+        before = previous.get(key)
+        if before and before['median'] > 0 and stats['median'] / before['median'] >= ratio:
+            regressions.append((key, before['median'], stats['median'], stats['median'] / before['median']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les temps de l'application sur des patients synthétiques")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="mesures par cas (la médiane est comparée)")
+    parser.add_argument("--only", nargs="+", help="ne mesure que les cas dont le nom contient l'un de ces mots")
+    parser.add_argument("--history", default=HISTORY_PATH, help="fichier d'historique JSON lines")
+    parser.add_argument("--no-history", action="store_true", help="n'ajoute pas la mesure à l'historique")
+    parser.add_argument("--allow-dirty", action="store_true",
+                        help="enregistre aussi une mesure faite avec des modifications non commitées")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help=f"code de sortie 1 si un cas est {REGRESSION_RATIO:.2f}x plus lent qu'avant")
+    args = parser.parse_args(argv)
+
+    # Les pages sont appelées hors de `streamlit run`: avertissements sans objet
+    logging.disable(logging.WARNING)
+
+    def report(key, stats):
+        print(f"{key:<40} {stats['median'] * 1000:12.2f} ms")
+
+    results = run(args.sizes, args.repeat, args.only, progress=report)
+    host = socket.gethostname()
+    entry = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'host': host,
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+    # Comparaison avec la dernière mesure de la même machine
+    previous = [past for past in read_history(args.history) if past.get('host') == host]
+    regressions = compare(results, previous[-1]['results']) if previous else []
+    for key, before, after, ratio in regressions:
+        print(f"⚠️ {key}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms (x{ratio:.2f}, "
+              f"depuis {previous[-1]['commit']})")
+
+    if args.no_history:
+        pass
+    elif entry['commit'] is None or (entry['commit'].endswith("+") and not args.allow_dirty):
+        # Référence reproductible uniquement: la mesure doit correspondre à un commit
+        print("ℹ️ Arbre de travail modifié: mesure non ajoutée à l'historique (--allow-dirty pour forcer)")
+    else:
+        append_history(entry, args.history)
+        print(f"✅ {args.history}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# chart_data.py - Données des graphiques: histogrammes pré-calculés, nuages de points sous-échantillonnés (WebGL)
+# (plotly n'est importé que pour construire les figures: les processus de
+# travail d'analysis_tasks n'utilisent que les calculs NumPy)
+import os
+
+import numpy as np
+
+from analysis_cache import LRUCache
+
+HISTOGRAM_BINS = 30
+MAX_SCATTER_POINTS = int(os.environ.get("TB_MAX_SCATTER_POINTS", 5000))
+DENSITY_GRID = 64   # cellules par axe du sous-échantillonnage par densité
+
+RANDOM = 'random'
+DENSITY = 'density'
+
+# Figures prêtes à afficher, partagées par toutes les sessions (séparées des
+# prétraitements d'ANALYSIS_CACHE pour ne pas les évincer)
+FIGURE_CACHE = LRUCache(maxsize=32)
+
+# Couleurs des clusters (palette qualitative de plotly)
+COLORS = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3', '#FF6692', '#B6E880']
+
+
+# =============================================================================
+# 🔹 HISTOGRAMMES
+# =============================================================================
+def histogram(values, bins=HISTOGRAM_BINS):
+    """{'counts', 'edges'} calculés côté serveur; une barre par valeur pour les petits entiers"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'b':
+        values = values.astype(np.uint8)
+    elif values.dtype.kind == 'f':
+        values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    if values.dtype.kind in 'iub' and int(values.max()) - int(values.min()) < bins:
+        edges = np.arange(int(values.min()), int(values.max()) + 2) - 0.5
+        counts, edges = np.histogram(values, bins=edges)
+    else:
+        counts, edges = np.histogram(values, bins=bins)
+    return {'counts': counts, 'edges': edges}
+
+
+def histogram_figure(hist, column, title=None):
+    """Barres jointives à partir d'un histogramme déjà calculé (taille indépendante du nombre de lignes)"""
+    import plotly.graph_objects as go
+    edges = hist['edges']
+    fig = go.Figure(go.Bar(x=edges[:-1], y=hist['counts'], width=np.diff(edges), offset=0, marker_color='#667eea',
+                           hovertemplate=f"{column}: %{{x}}<br>patients: %{{y}}<extra></extra>"))
+    fig.update_layout(title=title or f"Distribution de {column}", xaxis_title=column, yaxis_title='count',
+                      bargap=0)
+    return fig
+
+
+# =============================================================================
+# 🔹 SOUS-ÉCHANTILLONNAGE
+# =============================================================================
+def _grid_cells(x, y, grid):
+    """Numéro de cellule d'une grille grid × grid couvrant le nuage"""
+    def axis(values):
+        low, high = values.min(), values.max()
+        span = high - low if high > low else 1.0
+        return np.minimum(((values - low) / span * grid).astype(np.int64), grid - 1)
+    return axis(x) * grid + axis(y)
+
+
+def density_sample(x, y, max_points, grid=DENSITY_GRID, seed=42):
+    """Indices d'au plus `max_points` points: les cellules denses sont éclaircies, les points isolés gardés
+
+    Chaque cellule conserve au plus q points, q étant le plus grand quota qui
+    respecte `max_points` (points tirés au hasard dans la cellule).
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    cells = _grid_cells(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), grid)
+    counts = np.bincount(cells, minlength=grid * grid)
+
+    # Points conservés pour un quota q: somme des min(compte, q), croissante en q.
+    # Les petites cellules sont gardées entières, les autres reçoivent le quota.
+    sizes = np.sort(counts[counts > 0])
+    full = np.cumsum(sizes)
+    kept_at_size = full + sizes * (len(sizes) - np.arange(1, len(sizes) + 1))
+    i = int(np.searchsorted(kept_at_size, max_points, side='right'))
+    remaining = max_points - (full[i - 1] if i else 0)
+    quota = max(1, int(remaining // (len(sizes) - i)))
+
+    # Le reste de la division donne un point de plus à des cellules tirées au hasard
+    rng = np.random.default_rng(seed)
+    limits = np.minimum(counts, quota)
+    larger = np.flatnonzero(counts > quota)
+    extra = min(max(0, int(remaining - quota * (len(sizes) - i))), len(larger))
+    limits[rng.choice(larger, extra, replace=False)] += 1
+
+    # Rang de chaque point dans sa cellule après mélange aléatoire
+    order = np.lexsort((rng.random(n), cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    rank = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    return np.sort(order[rank < limits[sorted_cells]])
+
+
+def random_sample(n, max_points, seed=42):
+    """Indices triés d'un tirage uniforme sans remise"""
+    if n <= max_points:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, max_points, replace=False))
+
+
+def sample_points(x, y, max_points=MAX_SCATTER_POINTS, method=DENSITY, seed=42):
+    """Indices à afficher selon la méthode (RANDOM ou DENSITY)"""
+    if method == RANDOM:
+        return random_sample(len(x), max_points, seed)
+    return density_sample(x, y, max_points, seed=seed)
+
+
+# =============================================================================
+# 🔹 NUAGES DE POINTS
+# =============================================================================
+def scatter_figure(x, y, groups, title, x_title='PC1', y_title='PC2', max_points=MAX_SCATTER_POINTS,
+                   method=DENSITY, group_name='Cluster'):
+    """Nuage WebGL (Scattergl), une trace par groupe, sous-échantillonné au-delà de `max_points`"""
+    import plotly.graph_objects as go
+    x, y, groups = np.asarray(x), np.asarray(y), np.asarray(groups)
+    total = len(x)
+    keep = sample_points(x, y, max_points, method)
+    x, y, groups = x[keep], y[keep], groups[keep]
+    if len(keep) < total:
+        title = f"{title} · {len(keep):,} / {total:,} points affichés"
+
+    fig = go.Figure()
+    for i, group in enumerate(np.unique(groups)):
+        mask = groups == group
+        fig.add_trace(go.Scattergl(
+            x=x[mask], y=y[mask], mode='markers', name=f"{group_name} {group}",
+            marker={'size': 5, 'opacity': 0.7, 'color': COLORS[i % len(COLORS)]},
+        ))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title, legend_title_text=group_name)
+    return fig
+
+
+def cached_figure(version, key, build):
+    """Figure construite une fois par version des données; sans version, reconstruite à chaque appel"""
+    if version is None:
+        return build()
+    return FIGURE_CACHE.get_or_compute((version, *key), build)
@@ -0,0 +1,90 @@
+# clustering.py - K-means parallèle (méthode du coude) avec mode mini-batch
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import silhouette_score
+
+from analysis_cache import ANALYSIS_CACHE
+
+# Au-delà de ce nombre de lignes, MiniBatchKMeans remplace KMeans
+MINIBATCH_THRESHOLD = int(os.environ.get("TB_MINIBATCH_THRESHOLD", 10000))
+SILHOUETTE_SAMPLE = 2000
+MAX_K = 8
+
+
+def make_kmeans(n_clusters, n_samples, minibatch_threshold=MINIBATCH_THRESHOLD, random_state=42):
+    if n_samples > minibatch_threshold:
+        return MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, n_init=3, batch_size=2048)
+    return KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+
+
+def _fit_one(X, k, minibatch_threshold, silhouette_sample, random_state):
+    """Ajuste un modèle pour k clusters et mesure inertie et silhouette"""
+    start = time.perf_counter()
+    model = make_kmeans(k, len(X), minibatch_threshold, random_state)
+    labels = model.fit_predict(X)
+    fit_seconds = time.perf_counter() - start
+
+    silhouette, silhouette_seconds = None, 0.0
+    if 1 < k < len(X):
+        start = time.perf_counter()
+        silhouette = float(silhouette_score(X, labels, sample_size=min(silhouette_sample, len(X)),
+                                            random_state=random_state))
+        silhouette_seconds = time.perf_counter() - start
+
+    return {
+        'k': k,
+        'inertia': float(model.inertia_),
+        'silhouette': silhouette,
+        'fit_seconds': fit_seconds,
+        'silhouette_seconds': silhouette_seconds,
+        'algorithm': type(model).__name__,
+        'labels': labels.astype(np.int8),
+    }
+
+
+def kmeans_sweep(X, k_values, minibatch_threshold=MINIBATCH_THRESHOLD, silhouette_sample=SILHOUETTE_SAMPLE,
+                 n_jobs=-1, random_state=42):
+    """Ajuste un modèle par valeur de k, en parallèle sur tous les cœurs"""
+    return Parallel(n_jobs=n_jobs)(
+        delayed(_fit_one)(X, k, minibatch_threshold, silhouette_sample, random_state) for k in k_values
+    )
+
+
+def cluster(X, n_clusters, data_version=None, max_k=MAX_K, minibatch_threshold=MINIBATCH_THRESHOLD, n_jobs=-1):
+    """Méthode du coude + partition en `n_clusters` + projection PCA 2D
+
+    Le balayage et la PCA sont mis en cache par version des données; le modèle
+    du k choisi est repris du balayage quand il en fait partie.
+    """
+    def cached(key, compute):
+        if data_version is None:
+            return compute()
+        return ANALYSIS_CACHE.get_or_compute((data_version, 'clustering', *key), compute)
+
+    timings = {}
+    k_values = list(range(1, min(max_k, len(X) // 2)))
+
+    start = time.perf_counter()
+    sweep = cached(('sweep', tuple(k_values), minibatch_threshold),
+                   lambda: kmeans_sweep(X, k_values, minibatch_threshold, n_jobs=n_jobs))
+    timings['sweep_seconds'] = time.perf_counter() - start
+
+    selected = next((fit for fit in sweep if fit['k'] == n_clusters), None)
+    if selected is None:
+        start = time.perf_counter()
+        selected = cached(('fit', n_clusters, minibatch_threshold),
+                          lambda: _fit_one(X, n_clusters, minibatch_threshold, SILHOUETTE_SAMPLE, 42))
+        timings['fit_seconds'] = time.perf_counter() - start
+
+    pca = None
+    if X.shape[1] >= 2:
+        start = time.perf_counter()
+        pca = cached(('pca2d',), lambda: PCA(n_components=2).fit_transform(X).astype(np.float32))
+        timings['pca_seconds'] = time.perf_counter() - start
+
+    return {'sweep': sweep, 'selected': selected, 'labels': selected['labels'], 'pca': pca, 'timings': timings}
@@ -0,0 +1,153 @@
+# daily_stats.py - Agrégats journaliers matérialisés (date × risque × genre × prédiction)
+import datetime
+from collections import Counter
+
+import pandas as pd
+from sqlalchemy import text
+
+# Valeurs stockées à la place de NULL: les colonnes de la clé primaire sont NOT NULL
+NO_TEXT = ''
+NO_PREDICTION = -1
+
+# Regroupements de la courbe d'évolution: libellé -> période pandas
+PERIODS = {'Jour': 'D', 'Semaine': 'W', 'Mois': 'M'}
+
+_UPSERT = {
+    'sqlite': """
+        INSERT INTO daily_stats (jour, niveau_risque, genre, prediction, patients)
+        VALUES (:jour, :niveau_risque, :genre, :prediction, :patients)
+        ON CONFLICT (jour, niveau_risque, genre, prediction)
+        DO UPDATE SET patients = patients + excluded.patients
+    """,
+    'mysql': """
+        INSERT INTO daily_stats (jour, niveau_risque, genre, prediction, patients)
+        VALUES (:jour, :niveau_risque, :genre, :prediction, :patients)
+        ON DUPLICATE KEY UPDATE patients = patients + VALUES(patients)
+    """,
+}
+
+
+def _day(value):
+    """Date ISO (AAAA-MM-JJ) de la consultation, None si absente ou invalide"""
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, str):
+        try:
+            return datetime.date.fromisoformat(value[:10]).isoformat()
+        except ValueError:
+            pass
+    if value is None or value == '':
+        return None
+    day = pd.to_datetime(value, errors='coerce')
+    return None if pd.isna(day) else day.date().isoformat()
+
+
+def _text(value):
+    return NO_TEXT if value is None or pd.isna(value) else str(value)
+
+
+def _key(row):
+    day = _day(row.get('date_consultation'))
+    if day is None:
+        return None
+    prediction = row.get('prediction')
+    return (
+        day,
+        _text(row.get('niveau_risque')),
+        _text(row.get('genre')),
+        NO_PREDICTION if prediction is None or pd.isna(prediction) else int(prediction),
+    )
+
+
+# =============================================================================
+# 🔹 MISE À JOUR
+# =============================================================================
+def increment_daily_stats(conn, rows):
+    """Ajoute les lignes insérées aux agrégats, dans la transaction de l'insertion"""
+    counts = Counter(key for key in map(_key, rows) if key is not None)
+    if not counts:
+        return
+    conn.execute(text(_UPSERT[conn.dialect.name]), [
+        {'jour': jour, 'niveau_risque': risque, 'genre': genre, 'prediction': prediction, 'patients': patients}
+        for (jour, risque, genre, prediction), patients in counts.items()
+    ])
+
+
+def rebuild_daily_stats(conn):
+    """Recalcule entièrement les agrégats depuis la table patients"""
+    conn.execute(text("DELETE FROM daily_stats"))
+    conn.execute(text(f"""
+        INSERT INTO daily_stats (jour, niveau_risque, genre, prediction, patients)
+        SELECT DATE(date_consultation),
+               COALESCE(niveau_risque, '{NO_TEXT}'),
+               COALESCE(genre, '{NO_TEXT}'),
+               COALESCE(prediction, {NO_PREDICTION}),
+               COUNT(*)
+        FROM patients
+        WHERE DATE(date_consultation) IS NOT NULL
+        GROUP BY DATE(date_consultation), COALESCE(niveau_risque, '{NO_TEXT}'),
+                 COALESCE(genre, '{NO_TEXT}'), COALESCE(prediction, {NO_PREDICTION})
+    """))
+
+
+# =============================================================================
+# 🔹 LECTURE
+# =============================================================================
+def _read(engine, query, start=None, end=None):
+    conditions, params = [], {}
+    if start is not None:
+        conditions.append("jour >= :start")
+        params['start'] = start.isoformat()
+    if end is not None:
+        conditions.append("jour <= :end")
+        params['end'] = end.isoformat()
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return pd.read_sql(text(query.format(where=where)), con=engine, params=params)
+
+
+def risk_counts(engine, start=None, end=None):
+    df = _read(engine, """
+        SELECT niveau_risque, SUM(patients) AS count
+        FROM daily_stats {where}
+        GROUP BY niveau_risque
+        ORDER BY count DESC
+    """, start, end)
+    return df[df['niveau_risque'] != NO_TEXT].reset_index(drop=True)
+
+
+def gender_counts(engine, start=None, end=None):
+    df = _read(engine, """
+        SELECT genre, SUM(patients) AS count
+        FROM daily_stats {where}
+        GROUP BY genre
+    """, start, end)
+    return df[df['genre'] != NO_TEXT].reset_index(drop=True)
+
+
+def daily_counts(engine, start=None, end=None):
+    df = _read(engine, """
+        SELECT jour AS date, SUM(patients) AS count
+        FROM daily_stats {where}
+        GROUP BY jour
+        ORDER BY jour
+    """, start, end)
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    df['count'] = df['count'].astype(int)
+    return df
+
+
+def rollup(daily, period='Jour'):
+    """Regroupe des comptes journaliers (date, count) par semaine ou par mois"""
+    if daily is None or daily.empty or PERIODS[period] == 'D':
+        return daily
+    starts = pd.to_datetime(daily['date']).dt.to_period(PERIODS[period]).dt.start_time.dt.date
+    return daily.groupby(starts)['count'].sum().rename_axis('date').reset_index()
+
+
+def daily_stats(engine, start=None, end=None):
+    """Agrégats des graphiques risque, genre et évolution lus dans daily_stats"""
+    return {
+        'risk': risk_counts(engine, start, end),
+        'genre': gender_counts(engine, start, end),
+        'daily': daily_counts(engine, start, end),
+    }
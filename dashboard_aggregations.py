@@ -0,0 +1,165 @@
+# dashboard_aggregations.py - Indicateurs du tableau de bord calculés en SQL
+import pandas as pd
+from sqlalchemy import text
+
+AGE_BIN_WIDTH = 5
+RISK_LEVELS_AT_RISK = ('Élevé', 'Modéré')
+
+
+def _age_bucket_expr(engine):
+    """Tranche d'âge (borne inférieure) selon le dialecte SQL"""
+    if engine.dialect.name == 'mysql':
+        return "FLOOR(age / :width) * :width"
+    # SQLite: division entière sur la colonne INT
+    return "CAST(age / :width AS INTEGER) * :width"
+
+
+def _read(engine, query, params=None):
+    return pd.read_sql(text(query), con=engine, params=params or {})
+
+
+def _where(start=None, end=None, *conditions):
+    """Clause WHERE avec filtre de période (parcours par plage de l'index date_consultation)"""
+    conditions = list(conditions)
+    params = {}
+    if start is not None:
+        conditions.append("date_consultation >= :start")
+        params['start'] = start
+    if end is not None:
+        conditions.append("date_consultation <= :end")
+        params['end'] = end
+    clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return clause, params
+
+
+# =============================================================================
+# 🔹 AGRÉGATS SQL
+# =============================================================================
+def date_bounds(engine):
+    """Première et dernière date de consultation (MIN/MAX lus sur l'index)"""
+    row = _read(engine, "SELECT MIN(date_consultation) AS first, MAX(date_consultation) AS last FROM patients").iloc[0]
+    if pd.isna(row['first']):
+        return None, None
+    return pd.to_datetime(row['first']).date(), pd.to_datetime(row['last']).date()
+
+
+def kpi_summary(engine, start=None, end=None):
+    """Total, cas à risque et âge moyen en une seule requête"""
+    where, params = _where(start, end)
+    row = _read(engine, f"""
+        SELECT COUNT(*) AS total_patients,
+               COALESCE(SUM(prediction), 0) AS cas_risque,
+               AVG(age) AS age_moyen
+        FROM patients
+        {where}
+    """, params).iloc[0]
+    return {
+        'total_patients': int(row['total_patients']),
+        'cas_risque': int(row['cas_risque']),
+        'age_moyen': float(row['age_moyen']) if pd.notna(row['age_moyen']) else 0.0,
+    }
+
+
+def risk_counts(engine, start=None, end=None):
+    where, params = _where(start, end, "niveau_risque IS NOT NULL")
+    return _read(engine, f"""
+        SELECT niveau_risque, COUNT(*) AS count
+        FROM patients
+        {where}
+        GROUP BY niveau_risque
+        ORDER BY count DESC
+    """, params)
+
+
+def gender_counts(engine, start=None, end=None):
+    where, params = _where(start, end, "genre IS NOT NULL")
+    return _read(engine, f"""
+        SELECT genre, COUNT(*) AS count
+        FROM patients
+        {where}
+        GROUP BY genre
+    """, params)
+
+
+def age_histogram(engine, width=AGE_BIN_WIDTH, start=None, end=None):
+    bucket = _age_bucket_expr(engine)
+    where, params = _where(start, end, "age IS NOT NULL")
+    return _read(engine, f"""
+        SELECT {bucket} AS age, COUNT(*) AS count
+        FROM patients
+        {where}
+        GROUP BY {bucket}
+        ORDER BY age
+    """, {'width': width, **params})
+
+
+def daily_counts(engine, start=None, end=None):
+    # Regroupement sur la colonne elle-même pour profiter de l'index date_consultation
+    where, params = _where(start, end, "date_consultation IS NOT NULL")
+    df = _read(engine, f"""
+        SELECT date_consultation AS date, COUNT(*) AS count
+        FROM patients
+        {where}
+        GROUP BY date_consultation
+        ORDER BY date_consultation
+    """, params)
+    df['date'] = pd.to_datetime(df['date']).dt.date
+    return df
+
+
+def dashboard_stats(engine, start=None, end=None):
+    """Tous les agrégats du tableau de bord: seuls de petits résultats sont renvoyés"""
+    return {
+        'kpis': kpi_summary(engine, start, end),
+        'risk': risk_counts(engine, start, end),
+        'genre': gender_counts(engine, start, end),
+        'age': age_histogram(engine, start=start, end=end),
+        'daily': daily_counts(engine, start, end),
+    }
+
+
+# =============================================================================
+# 🔹 MÊMES AGRÉGATS SUR UN DATAFRAME (mode session sans base)
+# =============================================================================
+def _value_counts(series, name):
+    counts = series.dropna().value_counts()
+    # Les catégories fixes absentes des données apparaissent avec un compte nul
+    return counts[counts > 0].rename_axis(name).reset_index(name='count')
+
+
+def dashboard_stats_from_frame(df, width=AGE_BIN_WIDTH, start=None, end=None):
+    if 'date_consultation' in df.columns and (start is not None or end is not None):
+        dates = pd.to_datetime(df['date_consultation']).dt.date
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        df = df[mask]
+
+    total_patients = len(df)
+    if 'prediction' in df.columns:
+        cas_risque = int(df['prediction'].sum())
+    elif 'niveau_risque' in df.columns:
+        cas_risque = int(df['niveau_risque'].isin(RISK_LEVELS_AT_RISK).sum())
+    else:
+        cas_risque = 0
+
+    stats = {
+        'kpis': {
+            'total_patients': total_patients,
+            'cas_risque': cas_risque,
+            'age_moyen': float(df['age'].mean()) if 'age' in df.columns and total_patients else 0.0,
+        },
+        'risk': _value_counts(df['niveau_risque'], 'niveau_risque') if 'niveau_risque' in df.columns else None,
+        'genre': _value_counts(df['genre'], 'genre') if 'genre' in df.columns else None,
+        'age': None,
+        'daily': None,
+    }
+    if 'age' in df.columns:
+        ages = (df['age'].dropna() // width * width).astype(int)
+        stats['age'] = _value_counts(ages, 'age').sort_values('age')
+    if 'date_consultation' in df.columns:
+        dates = pd.to_datetime(df['date_consultation']).dt.date
+        stats['daily'] = _value_counts(dates, 'date').sort_values('date')
+    return stats
@@ -0,0 +1,87 @@
+# data_access.py - Accès paginé et incrémental à la table patients
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from patient_schema import append_compact, compact_patients
+
+PAGE_SIZE = 50
+CACHE_TTL = 60  # secondes
+
+
+# =============================================================================
+# 🔹 REQUÊTES
+# =============================================================================
+def count_patients(engine):
+    """Nombre de patients enregistrés (COUNT(*) côté serveur)"""
+    with engine.connect() as conn:
+        return int(conn.execute(text("SELECT COUNT(*) FROM patients")).scalar() or 0)
+
+
+def fetch_patients_page(engine, page=0, page_size=PAGE_SIZE):
+    """Page `page` (à partir de 0) des patients, triés par id"""
+    return pd.read_sql(
+        text("SELECT * FROM patients ORDER BY id LIMIT :limit OFFSET :offset"),
+        con=engine,
+        params={"limit": page_size, "offset": page * page_size},
+    )
+
+
+def fetch_patients_after(engine, after_id=0, limit=None):
+    """Patients d'id strictement supérieur à `after_id` (pagination par clé)"""
+    query = "SELECT * FROM patients WHERE id > :after_id ORDER BY id"
+    params = {"after_id": after_id}
+    if limit is not None:
+        query += " LIMIT :limit"
+        params["limit"] = limit
+    return pd.read_sql(text(query), con=engine, params=params)
+
+
+# =============================================================================
+# 🔹 CACHE INCRÉMENTAL
+# =============================================================================
+class IncrementalPatientCache:
+    """Copie locale de la table patients, complétée uniquement par les nouvelles lignes
+
+    La table n'est lue en entier qu'au premier accès; ensuite seules les lignes
+    d'id supérieur au dernier id vu sont demandées, au plus une fois par `ttl`
+    secondes ou dès que `invalidate()` est appelé après une écriture.
+    Le DataFrame retourné est typé (patient_schema) et partagé par toutes les
+    sessions: il ne doit jamais être modifié en place.
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.df = None
+        self.last_id = 0
+        self.refreshed_at = 0.0
+        self.stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self.stale = True
+
+    def reset(self):
+        with self._lock:
+            self.df = None
+            self.last_id = 0
+            self.stale = True
+
+    def get(self, engine):
+        with self._lock:
+            if self.df is not None and not self.stale and time.monotonic() - self.refreshed_at < self.ttl:
+                return self.df
+
+            new_rows = compact_patients(fetch_patients_after(engine, self.last_id))
+            if self.df is None:
+                self.df = new_rows
+            elif not new_rows.empty:
+                self.df = append_compact(self.df, new_rows)
+
+            if not new_rows.empty:
+                self.last_id = int(new_rows['id'].max())
+            self.refreshed_at = time.monotonic()
+            self.stale = False
+            return self.df
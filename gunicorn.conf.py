@@ -0,0 +1,25 @@
+# gunicorn.conf.py - Serveur WSGI multi-processus de l'API (gunicorn -c gunicorn.conf.py api:app)
+import multiprocessing
+import os
+
+# Local par défaut: exposer l'API (TB_API_BIND=0.0.0.0:8000) derrière un proxy TLS avec TB_API_TOKEN
+bind = os.environ.get("TB_API_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("TB_API_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("TB_API_THREADS", 2))
+
+# Le modèle est chargé par le maître (import de api.py) avant le fork des workers;
+# la base et la file d'écriture sont ouvertes dans chaque worker au premier appel
+preload_app = True
+
+
+def on_starting(server):
+    """Migrations appliquées une fois par le maître, avant le démarrage des workers"""
+    from connection_manager import ConnectionManager
+
+    manager = ConnectionManager.from_env(health_interval=0)
+    server.log.info("Schéma à jour (base %s)", manager.backend)
+    manager.close()
+
+timeout = 30
+keepalive = 5
+accesslog = "-"
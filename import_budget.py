@@ -0,0 +1,79 @@
+# import_budget.py - Budget de démarrage à froid de l'application (python -X importtime)
+#
+#   python import_budget.py                   # code de sortie 1 si le budget est dépassé
+#   python import_budget.py --budget-ms 800 --runs 5
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULE = "tb"
+BUDGET_MS = float(os.environ.get("TB_IMPORT_BUDGET_MS", 1500))
+RUNS = 3
+
+# Modules qui ne doivent pas être chargés avant l'écran de connexion
+# (streamlit charge lui-même plotly.graph_objects, mais pas plotly.express)
+FORBIDDEN = ('pandas', 'numpy', 'pyarrow', 'sklearn', 'scipy', 'plotly.express', 'matplotlib', 'seaborn',
+             'sqlalchemy', 'joblib')
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module=MODULE):
+    """Un import à froid dans un nouvel interpréteur: (total en ms, {module: (profondeur, cumul en ms)})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} a échoué:\n{result.stderr[-2000:]}")
+
+    modules, total_us = {}, 0
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match[2]), len(match[3]) // 2, match[4]
+        modules[name] = (depth, cumulative / 1000)
+        if depth == 0:
+            total_us += cumulative
+    return total_us / 1000, modules
+
+
+def check(module=MODULE, budget_ms=BUDGET_MS, runs=RUNS, forbidden=FORBIDDEN):
+    """Meilleur de `runs` imports; retourne (ok, rapport)"""
+    total_ms, modules = min((measure(module) for _ in range(runs)), key=lambda run: run[0])
+    loaded = [name for name in forbidden if name in modules]
+    # Imports directs du module mesuré, du plus coûteux au moins coûteux
+    heaviest = sorted(((ms, name) for name, (depth, ms) in modules.items() if depth == 1), reverse=True)[:10]
+    report = {
+        'module': module,
+        'total_ms': total_ms,
+        'budget_ms': budget_ms,
+        'forbidden_loaded': loaded,
+        'heaviest': heaviest,
+    }
+    return total_ms <= budget_ms and not loaded, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie le temps d'import à froid de l'application")
+    parser.add_argument("--module", default=MODULE, help="module à importer (défaut: tb)")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help="budget en millisecondes")
+    parser.add_argument("--runs", type=int, default=RUNS, help="nombre de mesures (la meilleure est retenue)")
+    args = parser.parse_args(argv)
+
+    ok, report = check(args.module, args.budget_ms, args.runs)
+    print(f"import {report['module']}: {report['total_ms']:.0f} ms (budget {report['budget_ms']:.0f} ms)")
+    for ms, name in report['heaviest']:
+        print(f"   {ms:8.1f} ms  {name}")
+    if report['forbidden_loaded']:
+        print(f"❌ chargés au démarrage: {', '.join(report['forbidden_loaded'])}")
+    print("✅ budget respecté" if ok else "❌ budget dépassé")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+# inference.py - Moteur d'inférence vectorisé TB Diagnostic Pro
+import copy
+import logging
+import os
+import pickle
+import threading
+import warnings
+
+import numpy as np
+import joblib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, "tuberculosis_model.pkl")
+
+# Artefacts versionnés produits par train.py; LATEST contient le nom du plus récent
+ARTIFACT_DIR = os.environ.get("TB_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+LATEST_FILE = "LATEST"
+# Sans artefact promu ni TB_MODEL_PATH, les règles cliniques s'appliquent: le
+# modèle du notebook (MODEL_PATH) n'a pas passé la porte AUC de train.py et ne
+# prédit aucun cas positif; il reste utilisable explicitement via TB_MODEL_PATH
+NO_VALIDATED_MODEL = "aucun modèle validé (models/LATEST ou TB_MODEL_PATH)"
+
+# Erreurs de chargement qui font basculer sur les règles cliniques: fichier absent
+# ou illisible, pickle tronqué, version de scikit-learn incompatible
+LOAD_ERRORS = (OSError, EOFError, pickle.UnpicklingError, ImportError, AttributeError, KeyError, TypeError,
+               ValueError)
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# 🔹 ENCODAGE DES CARACTÉRISTIQUES
+# =============================================================================
+# Encodage des listes déroulantes du formulaire de diagnostic
+MAPPING = {
+    'Genre': {'Homme': 1, 'Femme': 0},
+    'Douleur_Thoracique': {'Aucune': 0, 'Légère': 1, 'Modérée': 2, 'Sévère': 3},
+    'Fievre': {'Absente': 0, '<38°C': 1, '38-39°C': 2, '>39°C': 3},
+    'Sueurs_Nocturnes': {'Non': 0, 'Occasionnelles': 1, 'Fréquentes': 2, 'Très fréquentes': 3},
+    'Production_Crachats': {'Aucune': 0, 'Faible': 1, 'Moyenne': 2, 'Importante': 3},
+    'Sang_Crachats': {'Non': 0, 'Oui': 1, 'Abondant': 2},
+    'Tabagisme': {'Jamais fumé': 0, 'Ancien fumeur': 1, '<10/jour': 2, '>10/jour': 3},
+    'Antecedents_TB': {'Non': 0, 'Oui, traité': 1, 'Oui, récurrent': 2}
+}
+
+# Ordre des colonnes de la matrice de caractéristiques (format de diagnostic_page)
+FEATURE_COLUMNS = [
+    'age', 'genre', 'douleur_thoracique', 'intensite_toux', 'essoufflement',
+    'fatigue', 'perte_poids', 'fievre', 'sueurs_nocturnes', 'production_crachats',
+    'sang_crachats', 'tabagisme', 'antecedents_tb'
+]
+
+# Tables de correspondance codes formulaire -> codes LabelEncoder du notebook
+# (LabelEncoder trie les modalités du CSV par ordre alphabétique)
+_FEVER_CODES = np.array([1, 1, 2, 0])        # Mild, Mild, Moderate, High
+_SPUTUM_CODES = np.array([1, 1, 2, 0])       # Low, Low, Medium, High
+_SMOKING_CODES = np.array([2, 1, 0, 0])      # Never, Former, Current, Current
+
+# Entrée des pipelines de train.py: la matrice FEATURE_COLUMNS (codes du formulaire)
+INPUT_CODES = 'codes_formulaire'
+
+# Patient_ID a été encodé comme une caractéristique lors de l'entraînement:
+# on le neutralise au centre de la plage vue par le modèle
+_NEUTRAL_PATIENT_ID = 9999.5
+
+
+def features_matrix(rows):
+    """Construit la matrice (n_patients, n_features) à partir de dictionnaires encodés"""
+    return np.array([[row[col] for col in FEATURE_COLUMNS] for row in rows], dtype=np.float64)
+
+
+class ValidationError(ValueError):
+    """Patient décrit de façon invalide (champ manquant, libellé inconnu)"""
+
+
+# Champs catégoriels attendus sous forme de libellés du formulaire de diagnostic
+LABEL_FIELDS = {key.lower(): codes for key, codes in MAPPING.items()}
+
+
+def encode_patients(patients):
+    """Matrice FEATURE_COLUMNS à partir de patients décrits par les libellés du formulaire"""
+    X = np.empty((len(patients), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, patient in enumerate(patients):
+        if not isinstance(patient, dict):
+            raise ValidationError(f"patient {i}: objet JSON attendu")
+        for j, col in enumerate(FEATURE_COLUMNS):
+            if col not in patient:
+                raise ValidationError(f"patient {i}: champ '{col}' manquant")
+            value = patient[col]
+            if col in LABEL_FIELDS:
+                if value not in LABEL_FIELDS[col]:
+                    raise ValidationError(f"patient {i}: '{col}' doit valoir {', '.join(LABEL_FIELDS[col])}")
+                X[i, j] = LABEL_FIELDS[col][value]
+            else:
+                try:
+                    X[i, j] = float(value)
+                except (TypeError, ValueError):
+                    raise ValidationError(f"patient {i}: '{col}' doit être numérique")
+                if not np.isfinite(X[i, j]):
+                    raise ValidationError(f"patient {i}: '{col}' doit être un nombre fini")
+    return X
+
+
+def _to_model_layout(X, feature_names):
+    """Traduit la matrice du formulaire vers les colonnes attendues par le modèle"""
+    col = {name: X[:, i] for i, name in enumerate(FEATURE_COLUMNS)}
+
+    def codes(name, size):
+        return np.clip(col[name], 0, size - 1).astype(np.intp)
+
+    layout = {
+        'Patient_ID': np.full(len(X), _NEUTRAL_PATIENT_ID),
+        'Age': col['age'],
+        'Gender': col['genre'],
+        'Chest_Pain': col['douleur_thoracique'] > 0,
+        'Cough_Severity': np.clip(col['intensite_toux'], 0, 9),
+        'Breathlessness': np.clip(np.rint(col['essoufflement'] * 0.4), 0, 4),
+        'Fatigue': np.clip(col['fatigue'], 0, 9),
+        'Weight_Loss': np.clip(col['perte_poids'], 0, 15),
+        'Fever': _FEVER_CODES[codes('fievre', 4)],
+        'Night_Sweats': col['sueurs_nocturnes'] > 0,
+        'Sputum_Production': _SPUTUM_CODES[codes('production_crachats', 4)],
+        'Blood_in_Sputum': col['sang_crachats'] > 0,
+        'Smoking_History': _SMOKING_CODES[codes('tabagisme', 4)],
+        'Previous_TB_History': col['antecedents_tb'] > 0,
+    }
+    return np.column_stack([layout[name] for name in feature_names]).astype(np.float64)
+
+
+def risk_levels(probabilities):
+    """Niveau de risque de chaque probabilité (mêmes seuils que calculate_risk_level)"""
+    probabilities = np.asarray(probabilities)
+    return np.select([probabilities < 0.3, probabilities < 0.7], ["Faible", "Modéré"], default="Élevé")
+
+
+# =============================================================================
+# 🔹 MODÈLES
+# =============================================================================
+class RuleBasedModel:
+    """Score clinique à base de règles, utilisé si le modèle entraîné est indisponible"""
+
+    classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        col = {name: X[:, i] for i, name in enumerate(FEATURE_COLUMNS)}
+        risk_score = (
+            # Symptômes respiratoires
+            0.3 * (col['intensite_toux'] > 5)
+            + 0.4 * (col['sang_crachats'] > 0)
+            + 0.2 * (col['douleur_thoracique'] > 1)
+            # Symptômes généraux
+            + 0.2 * (col['fievre'] > 1)
+            + 0.1 * (col['sueurs_nocturnes'] > 1)
+            + 0.2 * (col['perte_poids'] > 2)
+            # Facteurs de risque
+            + 0.3 * (col['antecedents_tb'] > 0)
+            + 0.1 * (col['tabagisme'] > 1)
+            # Ajustement par âge
+            + 0.1 * ((col['age'] < 10) | (col['age'] > 60))
+        )
+        probability = np.minimum(0.95, risk_score)
+        return np.column_stack([1 - probability, probability])
+
+
+class InferenceEngine:
+    """Score des lots de patients en un seul appel predict_proba"""
+
+    def __init__(self, model, source="règles", metadata=None, load_error=None):
+        self.source = source
+        # Raison du repli sur les règles cliniques (None si le modèle demandé est chargé)
+        self.load_error = load_error
+        # Pipeline versionné (train.py): il reçoit la matrice de codes telle quelle
+        self.metadata = metadata
+        # Seuil de décision calibré par train.py (0.5 pour les autres modèles)
+        self.threshold = float((metadata or {}).get('threshold', 0.5))
+        self.feature_names = None if metadata is not None else getattr(model, 'feature_names_in_', None)
+        if self.feature_names is not None:
+            # Les colonnes sont réordonnées par _to_model_layout: la matrice NumPy
+            # est passée telle quelle à une copie superficielle sans noms de
+            # colonnes (l'estimateur de l'appelant n'est pas modifié)
+            model = copy.copy(model)
+            del model.feature_names_in_
+        self.model = model
+        classes = list(getattr(model, 'classes_', [0, 1]))
+        self._positive = classes.index(1) if 1 in classes else len(classes) - 1
+
+    @classmethod
+    def from_path(cls, path=MODEL_PATH):
+        """Charge l'artefact ou le modèle entraîné, ou bascule (journalisé) sur les règles cliniques"""
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                model = joblib.load(path)
+            if isinstance(model, dict) and 'pipeline' in model:
+                metadata = model['metadata']
+                if metadata.get('input') != INPUT_CODES or metadata.get('features') != FEATURE_COLUMNS:
+                    raise ValueError("artefact entraîné sur un autre format d'entrée, relancer train.py")
+                return cls(model['pipeline'], source=os.path.basename(path), metadata=metadata)
+            return cls(model, source=os.path.basename(path))
+        except LOAD_ERRORS as e:
+            error = f"{os.path.basename(path)}: {type(e).__name__}: {e}"
+            logger.warning("Modèle inutilisable, repli sur les règles cliniques (%s)", error)
+            return cls(RuleBasedModel(), load_error=error)
+
+    @property
+    def fallback(self):
+        """Vrai si le modèle demandé n'a pas pu être chargé"""
+        return self.load_error is not None
+
+    def predict_proba(self, X):
+        """Probabilité de tuberculose pour chaque ligne de X (format FEATURE_COLUMNS)"""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
+        if self.feature_names is not None:
+            X = _to_model_layout(X, self.feature_names)
+        return self.model.predict_proba(X)[:, self._positive]
+
+    def predict(self, X):
+        """Retourne (prédictions, probabilités) pour un lot de patients"""
+        probabilities = self.predict_proba(X)
+        predictions = (probabilities > self.threshold).astype(np.int8)
+        return predictions, probabilities
+
+
+# Registre des moteurs chargés: un seul chargement du pickle par processus
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def latest_artifact(directory=ARTIFACT_DIR):
+    """Chemin de l'artefact désigné par LATEST, ou None"""
+    try:
+        with open(os.path.join(directory, LATEST_FILE), encoding='utf-8') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(directory, name)
+    return path if name and os.path.exists(path) else None
+
+
+def default_model_path():
+    """TB_MODEL_PATH, sinon le dernier artefact promu par train.py, sinon None (règles cliniques)"""
+    return os.environ.get("TB_MODEL_PATH") or latest_artifact()
+
+
+def get_engine(path=None):
+    """Retourne le moteur d'inférence partagé pour ce modèle (règles cliniques sans modèle validé)"""
+    path = path or default_model_path()
+    with _ENGINES_LOCK:
+        if path not in _ENGINES:
+            if path is None:
+                _ENGINES[path] = InferenceEngine(RuleBasedModel(), load_error=NO_VALIDATED_MODEL)
+            else:
+                _ENGINES[path] = InferenceEngine.from_path(path)
+        return _ENGINES[path]
+
+
+def score_patients(patients, engine=None):
+    """Prédiction, probabilité et niveau de risque de patients décrits par les libellés du formulaire"""
+    predictions, probabilities = (engine or get_engine()).predict(encode_patients(patients))
+    return [
+        {'prediction': int(prediction), 'probabilite': float(probability), 'niveau_risque': str(level)}
+        for prediction, probability, level in zip(predictions, probabilities, risk_levels(probabilities))
+    ]
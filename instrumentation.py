@@ -0,0 +1,169 @@
+# instrumentation.py - Latence par étape (pages, données, ML), par session et pour tout le processus
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import LATENCY_BUCKETS_MS, Histogram, info_metric
+
+# Les analyses (clustering, importance) dépassent les compartiments des requêtes HTTP
+STAGE_BUCKETS_MS = LATENCY_BUCKETS_MS + (5000, 10000, 30000, 60000)
+MAX_SESSIONS = 200
+METRIC_NAME = "tb_stage_duration_ms"
+PROFILE_LINES = 40
+
+# Session Streamlit de l'exécution en cours (posée par tb.main dans le thread du script)
+current_session = contextvars.ContextVar("current_session", default=None)
+
+
+class StageRecorder:
+    """Histogrammes de durée par étape, globaux et par session (sessions les plus récentes)"""
+
+    def __init__(self, buckets=STAGE_BUCKETS_MS, max_sessions=MAX_SESSIONS):
+        self.buckets = buckets
+        self.max_sessions = max_sessions
+        self._stages = {}
+        self._sessions = OrderedDict()
+        self._info = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, ms, session=None):
+        with self._lock:
+            histograms = [self._stages.setdefault(stage, Histogram(self.buckets))]
+            if session is not None:
+                stages = self._sessions.setdefault(session, {})
+                self._sessions.move_to_end(session)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                histograms.append(stages.setdefault(stage, Histogram(self.buckets)))
+        for histogram in histograms:
+            histogram.observe(ms)
+
+    def snapshot(self, session=None):
+        """{étape: snapshot de l'histogramme} pour une session, ou pour tout le processus"""
+        with self._lock:
+            stages = dict(self._sessions.get(session, {}) if session is not None else self._stages)
+        return {stage: histogram.snapshot() for stage, histogram in sorted(stages.items())}
+
+    def set_info(self, name, labels):
+        """Métrique d'information exportée avec les étapes (ex. modèle chargé et repli éventuel)"""
+        with self._lock:
+            self._info[name] = dict(labels)
+
+    def reset(self, session=None):
+        with self._lock:
+            if session is None:
+                self._stages.clear()
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session, None)
+
+    def prometheus(self):
+        """Toutes les étapes du processus au format texte Prometheus"""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            info = sorted(self._info.items())
+        lines = [f"# HELP {METRIC_NAME} Durée des étapes de l'application (ms)",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for stage, histogram in stages:
+            lines.extend(histogram.prometheus(METRIC_NAME, {'stage': stage}))
+        for name, labels in info:
+            lines.extend(info_metric(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+RECORDER = StageRecorder()
+
+
+# =============================================================================
+# 🔹 CHRONOMÈTRES
+# =============================================================================
+@contextmanager
+def stage(name):
+    """Chronomètre un bloc: `with stage("dashboard.figures"): ...` (exceptions comprises)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.observe(name, (time.perf_counter() - started) * 1000, current_session.get())
+
+
+def timed(name=None):
+    """Décorateur: chronomètre chaque appel sous `name` (par défaut module.fonction)"""
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# =============================================================================
+# 🔹 PROFILAGE À LA DEMANDE
+# =============================================================================
+@contextmanager
+def profiled(enabled, sink, sort="cumulative", lines=PROFILE_LINES):
+    """cProfile autour d'un bloc si `enabled`; `sink(texte)` reçoit les `lines` premières fonctions"""
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(lines)
+        sink(out.getvalue())
+
+
+# =============================================================================
+# 🔹 EXPORT PROMETHEUS
+# =============================================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = RECORDER.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_SERVER = {}
+_SERVER_LOCK = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """Sert GET /metrics (texte Prometheus) dans un thread; port TB_METRICS_PORT, rien si absent
+
+    Sans authentification: écoute sur TB_METRICS_HOST, 127.0.0.1 par défaut.
+    """
+    port = port or os.environ.get("TB_METRICS_PORT")
+    host = host or os.environ.get("TB_METRICS_HOST", "127.0.0.1")
+    if not port:
+        return None
+    with _SERVER_LOCK:
+        if 'server' not in _SERVER:
+            server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            _SERVER['server'] = server
+        return _SERVER['server']
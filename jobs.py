@@ -0,0 +1,186 @@
+# jobs.py - Tâches d'analyse en arrière-plan sur un pool de processus partagé
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+
+from analysis_cache import LRUCache
+
+JOBS_DIR = "data/jobs"
+
+# Tâches terminées conservées: au plus MAX_STORED_JOBS, et pas plus de JOB_TTL_HOURS
+JOB_TTL_HOURS = float(os.environ.get("TB_JOB_TTL_HOURS", 24))
+MAX_STORED_JOBS = int(os.environ.get("TB_JOB_MAX_STORED", 100))
+# Résultats déjà désérialisés, gardés en mémoire entre deux exécutions de la page
+RESULT_CACHE_SIZE = 16
+
+# États d'une tâche
+QUEUED, RUNNING, DONE, FAILED = "en attente", "en cours", "terminée", "échec"
+
+
+def _default_workers():
+    return int(os.environ.get("TB_JOB_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+
+def _cores_per_worker(max_workers):
+    """Part des cœurs de chaque processus de travail (n_jobs des tâches parallèles)"""
+    return max(1, (os.cpu_count() or 1) // max_workers)
+
+
+def _run_job(func, args, kwargs):
+    """Exécuté dans le processus de travail: retourne (résultat, début, fin)"""
+    started_at = time.time()
+    result = func(*args, **kwargs)
+    return result, started_at, time.time()
+
+
+class JobManager:
+    """Pool de processus borné, partagé par toutes les sessions
+
+    Chaque tâche reçoit un identifiant; son état est écrit dans `store_dir`
+    (<id>.json) et son résultat sérialisé avec joblib (<id>.joblib), de sorte
+    qu'il reste disponible après un changement de page ou un redémarrage.
+    Une tâche soumise avec la même `key` qu'une tâche en cours ou terminée
+    n'est pas relancée. Les tâches terminées sont supprimées après `ttl_hours`
+    ou au-delà des `max_stored` plus récentes.
+
+    Les tâches parallèles (clustering, forêts) doivent recevoir
+    `n_jobs=task_jobs`: les cœurs sont partagés entre les processus du pool.
+    """
+
+    def __init__(self, max_workers=None, store_dir=JOBS_DIR, ttl_hours=JOB_TTL_HOURS, max_stored=MAX_STORED_JOBS):
+        self.max_workers = max_workers or _default_workers()
+        self.task_jobs = _cores_per_worker(self.max_workers)
+        self.store_dir = store_dir
+        self.ttl = ttl_hours * 3600
+        self.max_stored = max_stored
+        if not os.path.exists(store_dir):
+            os.makedirs(store_dir)
+        # spawn: les processus de travail n'héritent pas des threads du serveur
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._futures = {}
+        self._jobs = {}
+        self._results = LRUCache(maxsize=RESULT_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._load_store()
+        self._cleanup()
+
+    # -------------------------------------------------------------------------
+    def submit(self, kind, func, *args, key=None, **kwargs):
+        """Soumet `func(*args, **kwargs)` au pool et retourne l'identifiant de la tâche"""
+        with self._lock:
+            if key is not None:
+                key = repr(key)
+                for job in self._jobs.values():
+                    if job['key'] == key and job['status'] != FAILED:
+                        return job['id']
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'kind': kind,
+                'key': key,
+                'status': QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'error': None,
+            }
+            self._jobs[job_id] = job
+            self._save_meta(job)
+            future = self._executor.submit(_run_job, func, args, kwargs)
+            self._futures[job_id] = future
+
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def status(self, job_id):
+        """Copie de l'état de la tâche (None si inconnue)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+            future = self._futures.get(job_id)
+        if job['status'] == QUEUED and future is not None and future.running():
+            job['status'] = RUNNING
+        end = job['finished_at'] or time.time()
+        job['elapsed'] = end - job['submitted_at']
+        return job
+
+    def result(self, job_id):
+        """Résultat d'une tâche terminée, lu sur disque une seule fois"""
+        def load():
+            path = self._result_path(job_id)
+            return joblib.load(path) if os.path.exists(path) else None
+        return self._results.get_or_compute(job_id, load)
+
+    def jobs(self):
+        with self._lock:
+            return sorted((dict(job) for job in self._jobs.values()),
+                          key=lambda job: job['submitted_at'], reverse=True)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------------------------------------------------------
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs[job_id]
+        try:
+            result, started_at, finished_at = future.result()
+            joblib.dump(result, self._result_path(job_id))
+            job.update(status=DONE, started_at=started_at, finished_at=finished_at)
+        except Exception as e:
+            job.update(status=FAILED, error=str(e), finished_at=time.time())
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._save_meta(job)
+        self._cleanup()
+
+    def _cleanup(self):
+        """Supprime les tâches terminées expirées ou au-delà des max_stored plus récentes"""
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job['status'] in (DONE, FAILED)),
+                              key=lambda job: job['finished_at'] or job['submitted_at'], reverse=True)
+            limit = time.time() - self.ttl
+            expired = [job['id'] for i, job in enumerate(finished)
+                       if i >= self.max_stored or (job['finished_at'] or job['submitted_at']) < limit]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            self._results.pop(job_id)
+            for path in (self._meta_path(job_id), self._result_path(job_id)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _meta_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _result_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.joblib")
+
+    def _save_meta(self, job):
+        with open(self._meta_path(job['id']), "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+
+    def _load_store(self):
+        for name in os.listdir(self.store_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.store_dir, name), encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job['status'] in (QUEUED, RUNNING):
+                # Interrompue par un redémarrage
+                job.update(status=FAILED, error="interrompue par un redémarrage")
+            self._jobs[job['id']] = job
@@ -0,0 +1,83 @@
+# metrics.py - Histogrammes à compartiments fixes (latences, tailles de lot)
+import bisect
+import threading
+
+# Compartiments par défaut des latences, en millisecondes
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 2500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def info_metric(name, labels):
+    """Métrique d'information au format texte Prometheus (valeur 1, le contenu est dans les étiquettes)"""
+    label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return [f"# TYPE {name} gauge", f"{name}{{{label_text}}} 1"]
+
+
+def power_of_two_buckets(maximum):
+    """1, 2, 4, ... jusqu'à `maximum` inclus (tailles de lot)"""
+    buckets, size = [], 1
+    while size < maximum:
+        buckets.append(size)
+        size *= 2
+    return tuple(buckets + [maximum])
+
+
+class Histogram:
+    """Histogramme cumulable: compte par borne supérieure, somme et nombre d'observations"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # dernier compartiment: +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q, counts=None):
+        """Borne supérieure du compartiment contenant le quantile q (estimation)"""
+        counts = counts or self._counts
+        total = sum(counts)
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        return {
+            'buckets': dict(zip([str(b) for b in self.buckets] + ['+Inf'], counts)),
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else None,
+            'p50': self.quantile(0.5, counts),
+            'p95': self.quantile(0.95, counts),
+            'p99': self.quantile(0.99, counts),
+        }
+
+    def prometheus(self, name, labels=None):
+        """Lignes au format texte Prometheus: _bucket (cumulés), _sum et _count"""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in (labels or {}).items())
+        prefix = label_text + "," if label_text else ""
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip([f"{b:g}" for b in self.buckets] + ['+Inf'], counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{label_text}}}" if label_text else ""
+        lines.append(f"{name}_sum{suffix} {total:g}")
+        lines.append(f"{name}_count{suffix} {count}")
+        return lines
@@ -0,0 +1,294 @@
+# migrations.py - Migrations versionnées du schéma (MySQL et SQLite)
+import base64
+import datetime
+import hashlib
+import os
+import secrets
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+try:
+    import fcntl
+except ImportError:     # Windows: pas de verrou entre processus sur SQLite
+    fcntl = None
+
+# Attente maximale du verrou des migrations (MySQL GET_LOCK), en secondes
+LOCK_TIMEOUT = 60
+LOCK_NAME = "tb_schema_migrations"
+
+# Colonnes de la table patients (hors clé primaire et horodatage)
+_PATIENT_COLUMNS = """
+    cin VARCHAR(20),
+    nom VARCHAR(100),
+    prenom VARCHAR(100),
+    age INT,
+    genre VARCHAR(10),
+    poids FLOAT,
+    taille FLOAT,
+    imc FLOAT,
+    douleur_thoracique VARCHAR(20),
+    intensite_toux INT,
+    essoufflement INT,
+    production_crachats VARCHAR(20),
+    sang_crachats VARCHAR(20),
+    fievre VARCHAR(20),
+    fatigue INT,
+    sueurs_nocturnes VARCHAR(20),
+    perte_poids FLOAT,
+    tabagisme VARCHAR(30),
+    antecedents_tb VARCHAR(30),
+    prediction INT,
+    probabilite FLOAT,
+    niveau_risque VARCHAR(20),
+    medecin_traitant VARCHAR(100),
+    date_consultation DATE,
+"""
+
+# Recherche plein texte SQLite: table FTS5 sur patients, tenue à jour par triggers
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        cin, nom, prenom, medecin_traitant,
+        content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, cin, nom, prenom, medecin_traitant)
+        VALUES (new.id, new.cin, new.nom, new.prenom, new.medecin_traitant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, cin, nom, prenom, medecin_traitant)
+        VALUES ('delete', old.id, old.cin, old.nom, old.prenom, old.medecin_traitant);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, cin, nom, prenom, medecin_traitant)
+        VALUES ('delete', old.id, old.cin, old.nom, old.prenom, old.medecin_traitant);
+        INSERT INTO patients_fts(rowid, cin, nom, prenom, medecin_traitant)
+        VALUES (new.id, new.cin, new.nom, new.prenom, new.medecin_traitant);
+    END
+    """,
+]
+
+_PRIMARY_KEY = {
+    'sqlite': "id INTEGER PRIMARY KEY AUTOINCREMENT,",
+    'mysql': "id INT AUTO_INCREMENT PRIMARY KEY,",
+}
+
+
+# =============================================================================
+# 🔹 OUTILS
+# =============================================================================
+def _index_exists(conn, dialect, table, name):
+    if dialect == 'mysql':
+        query = ("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                 "AND table_name = :table AND index_name = :name")
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND name = :name"
+    return conn.execute(text(query), {"table": table, "name": name}).first() is not None
+
+
+def _create_index(conn, dialect, table, name, columns):
+    # MySQL ne connaît pas CREATE INDEX IF NOT EXISTS
+    if not _index_exists(conn, dialect, table, name):
+        conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+
+
+@contextmanager
+def schema_lock(engine, timeout=LOCK_TIMEOUT):
+    """Verrou consultatif entre processus (workers gunicorn) autour des changements de schéma
+
+    MySQL: GET_LOCK nommé; SQLite: verrou fcntl sur un fichier voisin de la base.
+    """
+    if engine.dialect.name == 'mysql':
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": timeout}).scalar() != 1:
+                raise RuntimeError("verrou des migrations indisponible")
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+        return
+
+    database = engine.url.database
+    if fcntl is None or not database or database == ":memory:":
+        yield
+        return
+    directory = os.path.dirname(os.path.abspath(database))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.abspath(database) + "-migrate.lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _scrypt_v4(password):
+    """Empreinte au format de user_store avec le coût livré en version 4 (n=2**14, r=8, p=1)
+
+    Les comptes sont réhachés au coût courant à leur première connexion.
+    """
+    salt = secrets.token_bytes(16)
+    key = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=2 ** 14, r=8, p=1, maxmem=2 ** 25, dklen=32)
+    return f"scrypt${2 ** 14}$8$1${base64.b64encode(salt).decode('ascii')}${base64.b64encode(key).decode('ascii')}"
+
+
+# =============================================================================
+# 🔹 MIGRATIONS
+# =============================================================================
+def _001_create_patients(conn, dialect):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS patients (
+            {_PRIMARY_KEY[dialect]}
+            {_PATIENT_COLUMNS}
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+
+
+def _002_patient_indexes(conn, dialect):
+    for column in ['cin', 'date_consultation', 'niveau_risque', 'prediction', 'medecin_traitant']:
+        _create_index(conn, dialect, 'patients', f"idx_patients_{column}", column)
+
+
+def _003_daily_stats(conn, dialect):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            jour DATE NOT NULL,
+            niveau_risque VARCHAR(20) NOT NULL,
+            genre VARCHAR(10) NOT NULL,
+            prediction INT NOT NULL,
+            patients INT NOT NULL,
+            PRIMARY KEY (jour, niveau_risque, genre, prediction)
+        )
+    """))
+    # Agrégats des patients existants ('' et -1 remplacent les valeurs manquantes)
+    conn.execute(text("""
+        INSERT INTO daily_stats (jour, niveau_risque, genre, prediction, patients)
+        SELECT DATE(date_consultation), COALESCE(niveau_risque, ''), COALESCE(genre, ''),
+               COALESCE(prediction, -1), COUNT(*)
+        FROM patients
+        WHERE DATE(date_consultation) IS NOT NULL
+        GROUP BY DATE(date_consultation), COALESCE(niveau_risque, ''), COALESCE(genre, ''),
+                 COALESCE(prediction, -1)
+    """))
+
+
+def _004_users(conn, dialect):
+    primary_key = "id INTEGER PRIMARY KEY AUTOINCREMENT" if dialect == 'sqlite' else "id INT AUTO_INCREMENT PRIMARY KEY"
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS users (
+            {primary_key},
+            username VARCHAR(50) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            role VARCHAR(20) NOT NULL,
+            name VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    # Comptes par défaut de l'application
+    if conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == 0:
+        conn.execute(
+            text("INSERT INTO users (username, password_hash, role, name) VALUES (:username, :hash, :role, :name)"),
+            [{"username": "admin", "hash": _scrypt_v4("admin123"), "role": "admin", "name": "Administrateur"},
+             {"username": "medecin", "hash": _scrypt_v4("medecin123"), "role": "medecin", "name": "Dr Dupont"}],
+        )
+
+
+def _005_search_index(conn, dialect):
+    if dialect == 'mysql':
+        # Recherche par LIKE préfixe (cin et medecin_traitant sont indexés en version 2)
+        for column in ['nom', 'prenom']:
+            _create_index(conn, dialect, 'patients', f"idx_patients_{column}", column)
+        return
+
+    existing = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'"
+    )).first() is not None
+    try:
+        conn.execute(text(_SQLITE_FTS_DDL[0]))
+    except OperationalError as e:
+        if "no such module: fts5" not in str(e):
+            raise
+        return  # SQLite compilé sans FTS5: la recherche LIKE sera utilisée
+    for ddl in _SQLITE_FTS_DDL[1:]:
+        conn.execute(text(ddl))
+    if not existing:
+        # Indexe les patients déjà présents
+        conn.execute(text("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')"))
+
+
+def _006_fallback_sync(conn, dialect):
+    if dialect != 'sqlite':
+        return
+    # Dernier id SQLite recopié dans MySQL: les patients déjà présents ne sont pas recopiés
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS fallback_sync (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            synced_id INTEGER NOT NULL
+        )
+    """))
+    conn.execute(text(
+        "INSERT OR IGNORE INTO fallback_sync (id, synced_id) SELECT 1, COALESCE(MAX(id), 0) FROM patients"
+    ))
+
+
+# (version, description, fonction): ne jamais modifier une migration déjà livrée,
+# ajouter une nouvelle version à la fin de la liste
+MIGRATIONS = [
+    (1, "création de la table patients", _001_create_patients),
+    (2, "index cin, date_consultation, niveau_risque, prediction, medecin_traitant", _002_patient_indexes),
+    (3, "agrégats journaliers daily_stats", _003_daily_stats),
+    (4, "table users (scrypt salé)", _004_users),
+    (5, "index de recherche (FTS5 SQLite, nom et prenom MySQL)", _005_search_index),
+    (6, "suivi des patients SQLite à recopier dans MySQL", _006_fallback_sync),
+]
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migrate(engine, lock=True):
+    """Applique les migrations manquantes, chacune dans sa propre transaction
+
+    Sous schema_lock (sauf `lock=False`, verrou déjà pris par l'appelant).
+    Retourne la liste des versions appliquées lors de cet appel.
+    """
+    if lock:
+        with schema_lock(engine):
+            return migrate(engine, lock=False)
+
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(200),
+                applied_at TIMESTAMP
+            )
+        """))
+
+    done = applied_versions(engine)
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            apply(conn, dialect)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at)"),
+                {"version": version, "description": description, "applied_at": datetime.datetime.now()},
+            )
+        applied.append(version)
+    return applied
@@ -0,0 +1,136 @@
+# model_selection.py - Comparaison des modèles candidats: qualité, temps d'entraînement, latence et débit
+#
+#   python model_selection.py                    # -> models/leaderboard.json
+#   python model_selection.py --models logistic_regression random_forest --cv 3
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_validate, train_test_split
+
+from inference import ARTIFACT_DIR, INPUT_CODES, InferenceEngine
+from train import (CANDIDATES, CV_FOLDS, DATA_PATH, RANDOM_STATE, SCORING, TEST_SIZE, evaluate, file_sha256,
+                   load_dataset, make_pipeline)
+
+LEADERBOARD_PATH = os.path.join(ARTIFACT_DIR, "leaderboard.json")
+LATENCY_CALLS = 200
+THROUGHPUT_ROWS = 10000
+
+# Candidats du notebook (paramètres par défaut de train.py) + ensembles d'arbres
+MODELS = {
+    **{name: factory for name, (factory, _) in CANDIDATES.items()},
+    'random_forest': lambda: RandomForestClassifier(n_estimators=200, min_samples_leaf=5, class_weight='balanced',
+                                                    n_jobs=1, random_state=RANDOM_STATE),
+    'gradient_boosting': lambda: HistGradientBoostingClassifier(class_weight='balanced', random_state=RANDOM_STATE),
+}
+
+
+# =============================================================================
+# 🔹 MESURES
+# =============================================================================
+def single_row_latency(engine, X, calls=LATENCY_CALLS):
+    """Latence d'un patient via InferenceEngine.predict (ms: p50, p95, moyenne)"""
+    rows = X[np.arange(calls) % len(X)]
+    engine.predict(rows[:1])   # échauffement
+    timings = np.empty(calls)
+    for i in range(calls):
+        started = time.perf_counter()
+        engine.predict(rows[i:i + 1])
+        timings[i] = (time.perf_counter() - started) * 1000
+    return {
+        'p50': float(np.percentile(timings, 50)),
+        'p95': float(np.percentile(timings, 95)),
+        'mean': float(timings.mean()),
+    }
+
+
+def batch_throughput(engine, X, rows=THROUGHPUT_ROWS):
+    """Patients scorés par seconde sur un lot de `rows` lignes"""
+    batch = X[np.arange(rows) % len(X)]
+    started = time.perf_counter()
+    engine.predict(batch)
+    return rows / (time.perf_counter() - started)
+
+
+def benchmark_model(name, X_train, y_train, X_test, y_test, cv=CV_FOLDS, n_jobs=-1):
+    """Validation croisée parallèle, métriques de test et coût d'inférence d'un candidat"""
+    pipeline = make_pipeline(MODELS[name]())
+    scores = cross_validate(
+        pipeline, X_train, y_train, scoring=list(SCORING),
+        cv=StratifiedKFold(cv, shuffle=True, random_state=RANDOM_STATE), n_jobs=n_jobs,
+    )
+
+    started = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    # Mesuré à travers le moteur de production, sur la matrice de codes qu'il reçoit
+    engine = InferenceEngine(pipeline, source=name, metadata={'input': INPUT_CODES})
+    return {
+        'modele': name,
+        'estimateur': type(pipeline[-1]).__name__,
+        'cv': {metric: float(scores[f'test_{metric}'].mean()) for metric in SCORING}
+              | {f'{metric}_std': float(scores[f'test_{metric}'].std()) for metric in SCORING},
+        'cv_fit_seconds': float(scores['fit_time'].mean()),
+        'fit_seconds': fit_seconds,
+        'test': evaluate(pipeline, X_test, y_test),
+        'latency_ms': single_row_latency(engine, X_test),
+        'throughput_rows_per_s': batch_throughput(engine, X_test),
+    }
+
+
+# =============================================================================
+# 🔹 CLASSEMENT
+# =============================================================================
+def run(csv_path=DATA_PATH, models=tuple(MODELS), cv=CV_FOLDS, n_jobs=-1, progress=None):
+    """Classement des candidats par AUC de validation croisée"""
+    X, y = load_dataset(csv_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, stratify=y, random_state=RANDOM_STATE)
+
+    results = []
+    for name in models:
+        results.append(benchmark_model(name, X_train, y_train, X_test, y_test, cv, n_jobs))
+        if progress:
+            progress(results[-1])
+    results.sort(key=lambda entry: entry['cv']['roc_auc'], reverse=True)
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data': {'path': os.path.basename(csv_path), 'sha256': file_sha256(csv_path), 'rows': int(len(y))},
+        'cv_folds': cv,
+        'cpu_count': os.cpu_count(),
+        'leaderboard': results,
+    }
+
+
+def write_leaderboard(report, path=LEADERBOARD_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare les modèles candidats (AUC, entraînement, latence, débit)")
+    parser.add_argument("--csv", default=DATA_PATH, help="données au format TUBERCULOSE.CSV")
+    parser.add_argument("--output", default=LEADERBOARD_PATH, help="classement JSON")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--cv", type=int, default=CV_FOLDS, help="nombre de plis de validation croisée")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="processus parallèles (-1: tous les cœurs)")
+    args = parser.parse_args(argv)
+
+    def report(entry):
+        print(f"{entry['modele']:<20} auc={entry['cv']['roc_auc']:.4f} acc={entry['cv']['accuracy']:.4f} "
+              f"fit={entry['fit_seconds']:.2f}s p50={entry['latency_ms']['p50']:.2f}ms "
+              f"débit={entry['throughput_rows_per_s']:,.0f}/s")
+
+    path = write_leaderboard(run(args.csv, args.models, args.cv, args.n_jobs, progress=report), args.output)
+    print(f"✅ {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# page_analysis.py - Page d'analyse avancée (EDA, clustering, importance des variables)
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from analysis_cache import ANALYSIS_CACHE, data_version
+from analysis_tasks import clustering_task, eda_summary, feature_importance_task
+from app_common import inject_custom_css
+from app_data import load_analytics_data
+from chart_data import DENSITY, RANDOM, cached_figure, histogram_figure, scatter_figure
+from clustering import cluster
+from feature_importance import EXACT, FAST, IMPURITY, PERMUTATION, feature_importance
+from instrumentation import timed
+from jobs import DONE, FAILED, JobManager
+
+
+@st.cache_resource
+def get_job_manager():
+    """Pool de processus borné partagé par toutes les sessions"""
+    return JobManager()
+
+def track_job(kind, job_id, **params):
+    """Mémorise en session la dernière tâche de chaque type"""
+    if 'analysis_jobs' not in st.session_state:
+        st.session_state.analysis_jobs = {}
+    st.session_state.analysis_jobs[kind] = {'id': job_id, **params}
+
+def show_job(jobs, kind):
+    """Affiche l'état de la dernière tâche `kind` et retourne son résultat une fois terminée"""
+    tracked = st.session_state.get('analysis_jobs', {}).get(kind)
+    if not tracked:
+        return None
+    job = jobs.status(tracked['id'])
+    if job is None:
+        return None
+    
+    if job['status'] == FAILED:
+        st.error(f"❌ Tâche {job['id']} en échec: {job['error']}")
+        return None
+    if job['status'] != DONE:
+        st.info(f"⏳ Tâche {job['id']} {job['status']} depuis {job['elapsed']:.0f}s")
+        st.button("🔄 Actualiser", key=f"refresh_{kind}")
+        return None
+    
+    st.caption(f"Tâche {job['id']} terminée en {job['finished_at'] - job['started_at']:.2f}s")
+    return jobs.result(job['id'])
+
+def advanced_analysis_page(engine):
+    inject_custom_css()
+    
+    # En-tête amélioré
+    st.markdown("""
+    <div class='main-header'>
+        <h1 style='color: white; margin: 0;'>🔬 Analyse Avancée des Données</h1>
+        <p style='color: white; opacity: 0.9; margin: 0;'>Machine Learning et Analytics avancés</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    try:
+        # Charger les données (instantané colonne si une base est disponible)
+        df = load_analytics_data(engine)
+        
+        if df.empty:
+            st.info("📝 Aucune donnée patient disponible")
+            return
+        
+        # Afficher les informations de base dans une carte
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.info(f"📊 Dataset chargé: {df.shape[0]} patients, {df.shape[1]} variables")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Initialiser l'analyseur (prétraitements en cache par version des données)
+        analyzer = AdvancedDataAnalyzer(df=df, data_version=data_version(df))
+        
+        # Les analyses longues tournent dans le pool de tâches partagé
+        jobs = get_job_manager()
+        version = analyzer.data_version
+        
+        # Onglets d'analyse stylisés
+        tab1, tab2, tab3 = st.tabs(["📈 **Analyse Exploratoire**", "🎯 **Clustering**", "📊 **Analyse des Features**"])
+        
+        with tab1:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            st.subheader("Analyse Exploratoire des Données")
+            if st.button("🚀 Lancer l'Analyse Exploratoire", use_container_width=True, key="eda"):
+                track_job('eda', jobs.submit('eda', eda_summary, analyzer.df, key=(version, 'eda')))
+            summary = show_job(jobs, 'eda')
+            if summary is not None:
+                analyzer.comprehensive_eda(summary=summary)
+                st.success("✅ Analyse exploratoire terminée!")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with tab2:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            st.subheader("Analyse de Clustering")
+            n_clusters = st.slider("**Nombre de clusters**", 2, 6, 3, key="clusters")
+            sample = st.radio("**Points affichés**", [DENSITY, RANDOM], horizontal=True, key="cluster_sample",
+                              format_func={DENSITY: "Selon la densité (points isolés conservés)",
+                                           RANDOM: "Échantillon aléatoire"}.get)
+            
+            if st.button("🎯 Effectuer le Clustering", use_container_width=True, key="cluster_btn"):
+                analyzer.preprocess_data(target_column='prediction')
+                track_job('clustering', jobs.submit(
+                    'clustering', clustering_task, analyzer.X_scaled, n_clusters, analyzer.features_version,
+                    n_jobs=jobs.task_jobs, key=(analyzer.features_version, 'clustering', n_clusters)
+                ), n_clusters=n_clusters)
+            result = show_job(jobs, 'clustering')
+            if result is not None:
+                done_clusters = st.session_state.analysis_jobs['clustering']['n_clusters']
+                clusters = analyzer.perform_clustering(n_clusters=done_clusters, result=result, sample=sample)
+                if clusters is not None:
+                    st.success(f"✅ Clustering terminé avec {done_clusters} clusters")
+                else:
+                    st.error("❌ Échec du clustering")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with tab3:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            st.subheader("Analyse des Caractéristiques")
+            st.info("Cette analyse identifie les variables les plus importantes pour prédire le risque TB")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                mode = st.radio("**Mode**", [FAST, EXACT], horizontal=True, key="importance_mode",
+                                format_func={FAST: "⚡ Rapide (sous-échantillon)", EXACT: "🎯 Exact (rapport)"}.get)
+            with col2:
+                method = st.radio("**Méthode**", [IMPURITY, PERMUTATION], horizontal=True, key="importance_method",
+                                  format_func={IMPURITY: "Impureté (forêt)", PERMUTATION: "Permutation"}.get)
+            
+            if st.button("📊 Analyser l'Importance des Features", use_container_width=True, key="features"):
+                analyzer.preprocess_data(target_column='prediction')
+                if analyzer.y is None:
+                    st.warning("⚠️ Veuillez spécifier une variable cible")
+                else:
+                    track_job('features', jobs.submit(
+                        'features', feature_importance_task, analyzer.X, analyzer.y, mode, method,
+                        analyzer.features_version, n_jobs=jobs.task_jobs,
+                        key=(analyzer.features_version, 'features', mode, method)
+                    ))
+            importance = show_job(jobs, 'features')
+            if importance is not None:
+                feature_importance = analyzer.advanced_feature_analysis(result=importance)
+                if feature_importance is not None:
+                    st.subheader("Top 10 des Caractéristiques Importantes")
+                    st.dataframe(feature_importance.head(10), use_container_width=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+    except Exception as e:
+        st.error(f"❌ Erreur d'analyse: {e}")
+
+# =============================================================================
+# 🔹 CLASSE ANALYSE AVANCÉE
+# =============================================================================
+class AdvancedDataAnalyzer:
+    def __init__(self, data_path=None, df=None, data_version=None):
+        # Avec une version de données, les prétraitements sont partagés via ANALYSIS_CACHE
+        self.data_version = data_version
+        if df is not None:
+            self.df, self.encoders = self._cached('clean', lambda: self._clean_dataframe(df))
+        elif data_path:
+            self.df, self.encoders = self._cached('clean', lambda: self._clean_dataframe(pd.read_csv(data_path)))
+        else:
+            raise ValueError("Fournir soit un DataFrame soit un chemin de fichier")
+        
+        # self.df est partagé (cache d'analyse, cache patients): aucune copie défensive
+        self.features_version = None
+        self.scaler = StandardScaler()
+        self.pca = PCA()
+        self.kmeans = None
+        self.analysis_results = {}
+    
+    def _cached(self, *key_and_compute):
+        """Calcule ou réutilise un résultat pour cette version des données"""
+        *key, compute = key_and_compute
+        if self.data_version is None:
+            return compute()
+        return ANALYSIS_CACHE.get_or_compute((self.data_version, *key), compute)
+    
+    @timed()
+    def _clean_dataframe(self, df):
+        """Nettoie le DataFrame et convertit les types de données (retourne aussi les encodeurs)"""
+        encoders = {}
+        
+        # Supprimer les colonnes non numériques problématiques pour l'analyse
+        # (drop retourne un nouveau DataFrame: le DataFrame partagé n'est pas copié ni modifié)
+        columns_to_drop = ['cin', 'nom', 'prenom', 'medecin_traitant', 'date_consultation', 'created_at']
+        df_clean = df.drop(columns=[col for col in columns_to_drop if col in df.columns])
+        
+        # Convertir les colonnes catégorielles en numériques
+        categorical_columns = df_clean.select_dtypes(include=['object', 'category']).columns
+        for col in categorical_columns:
+            if df_clean[col].nunique() <= 10:
+                values = df_clean[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.cat.remove_unused_categories()
+                dummies = pd.get_dummies(values, prefix=col)
+                df_clean = pd.concat([df_clean, dummies], axis=1)
+                df_clean = df_clean.drop(columns=[col])
+            else:
+                le = LabelEncoder()
+                df_clean[col] = le.fit_transform(df_clean[col].astype(str))
+                encoders[col] = le
+        
+        for col in df_clean.columns:
+            if not pd.api.types.is_numeric_dtype(df_clean[col]):
+                try:
+                    df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+                except:
+                    df_clean = df_clean.drop(columns=[col])
+        
+        df_clean = df_clean.fillna(df_clean.median(numeric_only=True))
+        
+        return df_clean, encoders
+    
+    @timed()
+    def comprehensive_eda(self, summary=None):
+        """Analyse exploratoire complète des données (summary: résultat d'eda_summary déjà calculé)"""
+        if summary is None:
+            summary = eda_summary(self.df)
+        st.subheader("📊 Analyse Exploratoire des Données")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Dimensions", f"{summary['shape'][0]} lignes × {summary['shape'][1]} colonnes")
+        with col2:
+            st.metric("Valeurs Manquantes", summary['missing'])
+        with col3:
+            st.metric("Colonnes Numériques", summary['numeric_columns'])
+        with col4:
+            st.metric("Colonnes Total", summary['shape'][1])
+        
+        st.subheader("Aperçu des Données")
+        st.dataframe(summary['head'])
+        
+        st.subheader("Statistiques Descriptives")
+        st.dataframe(summary['describe'])
+        
+        if summary['histograms']:
+            st.subheader("Distribution des Variables Numériques")
+            for col, hist in summary['histograms'].items():
+                fig = cached_figure(self.data_version, ('histogram', col),
+                                    lambda hist=hist, col=col: histogram_figure(hist, col))
+                st.plotly_chart(fig, use_container_width=True)
+        
+        self.analysis_results['eda'] = summary
+        return self.analysis_results
+    
+    @timed()
+    def preprocess_data(self, target_column=None, normalize=True):
+        """Prétraitement avancé des données (réutilisé tant que les données ne changent pas)"""
+        self.features_version = None if self.data_version is None else (self.data_version, target_column, normalize)
+        self.df, self.X, self.y, self.X_scaled, self.scaler, error = self._cached(
+            'preprocess', target_column, normalize,
+            lambda: self._preprocess(target_column, normalize)
+        )
+        if error:
+            st.error(f"❌ Erreur lors de la normalisation: {error}")
+        elif normalize and len(self.X.columns) > 0:
+            st.success(f"✅ Données prétraitées: {self.X.shape}")
+    
+    def _preprocess(self, target_column, normalize):
+        # Ne modifie pas self.df en place: il peut être partagé par le cache
+        df = self.df
+        non_numeric = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+        if non_numeric:
+            df = df.assign(**{col: pd.to_numeric(df[col], errors='coerce') for col in non_numeric})
+        
+        if df.isnull().values.any():
+            df = df.fillna(df.median(numeric_only=True))
+        
+        if target_column and target_column in df.columns:
+            X = df.drop(columns=[target_column])
+            y = df[target_column]
+        else:
+            X = df
+            y = None
+        
+        scaler = StandardScaler()
+        error = None
+        if normalize and len(X.columns) > 0:
+            try:
+                X_scaled = scaler.fit_transform(X)
+            except Exception as e:
+                error = str(e)
+                X_scaled = X.values
+        else:
+            X_scaled = X.values
+        return df, X, y, X_scaled, scaler, error
+        
+    @timed()
+    def perform_clustering(self, n_clusters=3, result=None, sample=DENSITY):
+        """Effectue un clustering K-means avancé (result: résultat de cluster() déjà calculé)
+
+        Le nuage PCA est sous-échantillonné (`sample`: DENSITY ou RANDOM) et rendu en WebGL.
+        """
+        if result is None:
+            if not hasattr(self, 'X_scaled'):
+                self.preprocess_data()
+            
+            if len(self.X.columns) == 0:
+                st.error("❌ Aucune caractéristique disponible pour le clustering")
+                return None
+            
+            try:
+                # Balayage des k en parallèle, mis en cache par version des données
+                result = cluster(self.X_scaled, n_clusters, data_version=self.features_version)
+            except Exception as e:
+                st.error(f"❌ Erreur lors du clustering: {e}")
+                return None
+        
+        sweep = result['sweep']
+        fig = px.line(x=[fit['k'] for fit in sweep], y=[fit['inertia'] for fit in sweep],
+                      title='Méthode du Coude pour le Nombre Optimal de Clusters')
+        fig.update_layout(xaxis_title='Nombre de Clusters', yaxis_title='WCSS')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Temps de calcul par k
+        timings_df = pd.DataFrame([{
+            'k': fit['k'],
+            'Algorithme': fit['algorithm'],
+            'Inertie': fit['inertia'],
+            'Silhouette': fit['silhouette'],
+            'Ajustement (s)': round(fit['fit_seconds'], 3),
+            'Silhouette (s)': round(fit['silhouette_seconds'], 3),
+        } for fit in sweep])
+        with st.expander("⏱️ Temps de calcul du clustering"):
+            st.dataframe(timings_df, use_container_width=True)
+            st.caption(" · ".join(f"{name}: {seconds:.3f}s" for name, seconds in result['timings'].items()))
+        
+        try:
+            clusters = result['labels']
+            
+            # Pas de colonne 'cluster' dans self.df: le DataFrame est partagé par le cache
+            self.analysis_results['clusters'] = clusters
+            
+            if result['pca'] is not None:
+                X_pca = result['pca']
+                fig = cached_figure(
+                    self.data_version, ('clusters', self.features_version, n_clusters, sample),
+                    lambda: scatter_figure(X_pca[:, 0], X_pca[:, 1], clusters,
+                                           f'Visualisation des Clusters (PCA) - {n_clusters} clusters',
+                                           method=sample)
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            
+            cluster_dist = pd.Series(clusters).value_counts().sort_index()
+            fig = px.pie(values=cluster_dist.values, names=[f'Cluster {i}' for i in cluster_dist.index], 
+                        title="Distribution des Clusters")
+            st.plotly_chart(fig, use_container_width=True)
+            
+            return clusters
+            
+        except Exception as e:
+            st.error(f"❌ Erreur lors du clustering: {e}")
+            return None
+    
+    @timed()
+    def advanced_feature_analysis(self, mode=FAST, method=IMPURITY, result=None):
+        """Analyse avancée des caractéristiques avec importance (result: résultat déjà calculé)"""
+        if result is None and (not hasattr(self, 'X') or not hasattr(self, 'y')):
+            st.warning("⚠️ Aucune variable cible définie pour l'analyse des features")
+            return None
+        
+        if result is None and self.y is None:
+            st.warning("⚠️ Veuillez spécifier une variable cible")
+            return None
+        
+        try:
+            if result is None:
+                # Tous les cœurs, sous-échantillon en mode rapide, cache par version des données
+                result = feature_importance(self.X, self.y, mode, method, data_version=self.features_version)
+            importance_df = result['importance']
+            
+            top_features = importance_df.head(10)
+            fig = px.bar(top_features, 
+                        x='importance', 
+                        y='feature',
+                        error_x='std' if 'std' in top_features.columns else None,
+                        orientation='h',
+                        title='Top 10 des Caractéristiques les Plus Importantes')
+            fig.update_layout(yaxis={'categoryorder':'total ascending'})
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"{result['model']} · méthode {result['method']} · mode {result['mode']} · "
+                       f"{result['rows']} lignes · {result['seconds']:.2f}s")
+            
+            self.analysis_results['feature_importance'] = importance_df
+            return importance_df
+            
+        except Exception as e:
+            st.error(f"❌ Erreur lors de l'analyse des features: {e}")
+            return None
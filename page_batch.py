@@ -0,0 +1,74 @@
+# page_batch.py - Page de dépistage par lot (fichiers au format TUBERCULOSE.CSV)
+import os
+import tempfile
+
+import streamlit as st
+
+from app_common import current_user, inject_custom_css
+from app_data import get_inference_engine, invalidate_patient_cache
+from batch_scoring import DEFAULT_CHUNKSIZE, make_sink, score_file
+
+
+def batch_scoring_page(engine):
+    inject_custom_css()
+
+    # En-tête amélioré
+    st.markdown("""
+    <div class='main-header'>
+        <h1 style='color: white; margin: 0;'>📁 Dépistage par Lot</h1>
+        <p style='color: white; opacity: 0.9; margin: 0;'>Scoring d'une campagne complète au format TUBERCULOSE.CSV</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+    uploaded_file = st.file_uploader("**Fichier de dépistage (CSV)**", type=["csv"], key="batch_file")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        chunksize = st.number_input("**Lignes par bloc**", 1000, 100000, DEFAULT_CHUNKSIZE, step=1000, key="batch_chunksize")
+    with col2:
+        destinations = ["📄 Fichier CSV", "🗃️ Fichier Parquet"]
+        if engine:
+            destinations.append("💾 Table patients")
+        destination = st.radio("**Destination des résultats**", destinations, key="batch_destination")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    if uploaded_file is not None and st.button("**🚀 Lancer le Dépistage**", use_container_width=True, type="primary"):
+        status = st.empty()
+
+        def report(stats):
+            status.info(f"⏳ {stats['rows']} patients scorés - {stats['rows_per_second']:.0f} lignes/s")
+
+        medecin = current_user()['name']
+        try:
+            if destination == "💾 Table patients":
+                stats = score_file(uploaded_file, make_sink(engine=engine), chunksize=chunksize,
+                                   engine=get_inference_engine(), medecin=medecin, progress=report)
+                invalidate_patient_cache()
+                file_name = None
+            else:
+                file_name = "depistage.parquet" if destination == "🗃️ Fichier Parquet" else "depistage.csv"
+                # Le fichier de résultats (données patients) est supprimé dès qu'il est lu
+                with tempfile.TemporaryDirectory() as directory:
+                    output_path = os.path.join(directory, file_name)
+                    stats = score_file(uploaded_file, make_sink(output_path), chunksize=chunksize,
+                                       engine=get_inference_engine(), medecin=medecin, progress=report)
+                    with open(output_path, "rb") as f:
+                        results = f.read()
+        except Exception as e:
+            st.error(f"❌ Erreur de dépistage: {e}")
+            return
+
+        status.success(f"✅ {stats['rows']} patients scorés en {stats['seconds']:.2f}s "
+                       f"({stats['rows_per_second']:.0f} lignes/s)")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("**Patients**", stats['rows'])
+        with col2:
+            st.metric("**Cas à Risque**", stats['positives'])
+        with col3:
+            st.metric("**Débit**", f"{stats['rows_per_second']:.0f} lignes/s")
+
+        if file_name:
+            st.download_button("📥 Télécharger les résultats", results, file_name=file_name,
+                               use_container_width=True)
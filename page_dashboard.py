@@ -0,0 +1,187 @@
+# page_dashboard.py - Tableau de bord analytique
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from analysis_cache import data_version
+from app_common import inject_custom_css
+from app_data import (cached_daily_stats, cached_dashboard_stats, cached_date_bounds, cached_frame_stats,
+                      cached_patient_count, cached_patients_page, cached_search, load_analytics_data,
+                      load_patient_data)
+from daily_stats import PERIODS, rollup
+from dashboard_aggregations import AGE_BIN_WIDTH
+from data_access import PAGE_SIZE
+from instrumentation import stage
+from patient_search import search_frame
+
+
+def dashboard_page(engine):
+    inject_custom_css()
+    
+    # En-tête amélioré
+    st.markdown("""
+    <div class='main-header'>
+        <h1 style='color: white; margin: 0;'>📊 Tableau de Bord Analytique</h1>
+        <p style='color: white; opacity: 0.9; margin: 0;'>Surveillance et analyse des données patients</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    try:
+        # Avec une base, tout est agrégé en SQL: aucune lecture de la table entière
+        df = None
+        if engine:
+            if cached_patient_count(engine) == 0:
+                load_patient_data(engine)  # initialise la table si elle est vide
+            first_date, last_date = cached_date_bounds(engine)
+        else:
+            df = load_analytics_data(engine)
+            dates = pd.to_datetime(df['date_consultation'], errors='coerce').dropna() if 'date_consultation' in df.columns else None
+            first_date, last_date = (dates.min().date(), dates.max().date()) if dates is not None and not dates.empty else (None, None)
+        
+        # Filtre de période
+        start, end = None, None
+        if first_date is not None:
+            period = st.date_input("📅 **Période**", value=(first_date, last_date), key="dashboard_period")
+            if isinstance(period, (list, tuple)) and len(period) == 2:
+                start, end = period
+        
+        with stage("dashboard.stats"):
+            if engine:
+                stats = dict(cached_dashboard_stats(engine, start, end))
+                # Risque, genre et évolution: agrégats matérialisés (daily_stats)
+                try:
+                    stats.update(cached_daily_stats(engine, start, end))
+                except Exception as e:
+                    st.sidebar.warning(f"Agrégats journaliers indisponibles: {e}")
+                    stats.update({'risk': None, 'genre': None, 'daily': None})
+            else:
+                stats = cached_frame_stats(df, data_version(df), start, end)
+        columns = (df if df is not None else cached_patients_page(engine, 0)).columns.tolist()
+        
+        if stats['kpis']['total_patients'] == 0:
+            st.info("📝 Aucune donnée patient disponible")
+            return
+        
+        # Debug: Afficher les colonnes disponibles
+        st.sidebar.write("🔍 Colonnes disponibles:", columns)
+        
+        # KPI dans des cartes - CORRIGÉ
+        st.subheader("📈 Indicateurs Clés de Performance")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            total_patients = stats['kpis']['total_patients']
+            st.metric("**Total Patients**", total_patients, "Patients")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            # Compter les cas à risque (prediction = 1)
+            cas_risque = stats['kpis']['cas_risque']
+            st.metric("**Cas à Risque**", cas_risque, f"{cas_risque} cas")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col3:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            # Calculer le taux de risque
+            taux_risque = (cas_risque / total_patients * 100) if total_patients > 0 else 0
+            st.metric("**Taux de Risque**", f"{taux_risque:.1f}%")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col4:
+            st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+            # Âge moyen
+            age_moyen = stats['kpis']['age_moyen']
+            st.metric("**Âge Moyen**", f"{age_moyen:.1f} ans")
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Graphiques
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.subheader("📊 Visualisations des Données")
+        # Construction et envoi des figures plotly
+        with stage("dashboard.charts"):
+            col1, col2 = st.columns(2)
+        
+            with col1:
+                # Répartition par genre
+                if stats['genre'] is not None and not stats['genre'].empty:
+                    fig_genre = px.pie(stats['genre'], names='genre', values='count', title="🔄 Répartition par Genre",
+                                     color_discrete_sequence=px.colors.sequential.Blues_r)
+                    st.plotly_chart(fig_genre, use_container_width=True)
+                else:
+                    st.info("📊 Données de genre non disponibles")
+            
+                # Distribution par âge (tranches calculées côté serveur)
+                if stats['age'] is not None and not stats['age'].empty:
+                    fig_age = px.bar(stats['age'], x='age', y='count', title="📅 Distribution par Âge",
+                                   labels={'age': 'Âge', 'count': 'Nombre de Patients'},
+                                   color_discrete_sequence=['#667eea'])
+                    fig_age.update_traces(offset=0, width=AGE_BIN_WIDTH)
+                    st.plotly_chart(fig_age, use_container_width=True)
+                else:
+                    st.info("📊 Données d'âge non disponibles")
+        
+            with col2:
+                # Répartition du risque
+                if stats['risk'] is not None and not stats['risk'].empty:
+                    risque_counts = stats['risk']
+                    fig_risque = px.bar(risque_counts, x='niveau_risque', y='count',
+                                      title="⚠️ Répartition du Niveau de Risque",
+                                      labels={'niveau_risque': 'Niveau de Risque', 'count': 'Nombre de Patients'},
+                                      color='niveau_risque',
+                                      color_discrete_map={'Faible': 'green', 'Modéré': 'orange', 'Élevé': 'red'})
+                    st.plotly_chart(fig_risque, use_container_width=True)
+                else:
+                    st.info("📊 Données de risque non disponibles")
+            
+                # Évolution temporelle
+                period = st.radio("**Regroupement**", list(PERIODS), horizontal=True, key="trend_period")
+                daily_cases = rollup(stats['daily'], period)
+                if daily_cases is not None:
+                    if len(daily_cases) > 1:
+                        fig_trend = px.line(daily_cases, x='date', y='count', 
+                                          title="📈 Évolution des Consultations",
+                                          color_discrete_sequence=['#764ba2'])
+                        st.plotly_chart(fig_trend, use_container_width=True)
+                    else:
+                        st.info("📈 Données temporelles insuffisantes")
+                else:
+                    st.info("📈 Données temporelles non disponibles")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Données brutes
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.subheader("📋 Données des Patients")
+        display_columns = ['cin', 'nom', 'prenom', 'age', 'genre', 'niveau_risque']
+        available_columns = [col for col in display_columns if col in columns]
+        
+        # Ajouter une recherche (CIN, nom, prénom, médecin)
+        search_term = st.text_input("🔍 Rechercher un patient...")
+        with stage("dashboard.search" if search_term else "dashboard.table"):
+            if search_term:
+                page = st.number_input("Page des résultats", 1, value=1, key="search_page")
+                if engine:
+                    filtered_df, has_more = cached_search(engine, search_term, page - 1)
+                else:
+                    filtered_df, has_more = search_frame(df, search_term, page - 1)
+                if filtered_df.empty:
+                    st.info("Aucun patient trouvé")
+                elif has_more:
+                    st.caption("D'autres résultats sont disponibles sur la page suivante")
+            elif engine:
+                # Pagination côté serveur
+                n_pages = max(1, -(-total_patients // PAGE_SIZE))
+                page = st.number_input(f"Page (sur {n_pages})", 1, n_pages, 1, key="patients_page")
+                filtered_df = cached_patients_page(engine, page - 1)
+            else:
+                filtered_df = df.head(10)
+        
+        if not available_columns:
+            st.warning("Aucune colonne de données disponible")
+        elif not filtered_df.empty:
+            st.dataframe(filtered_df[available_columns], use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+    except Exception as e:
+        st.error(f"❌ Erreur chargement données: {e}")
@@ -0,0 +1,249 @@
+# page_diagnostic.py - Page de diagnostic individuel
+from datetime import date
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from app_common import current_user, inject_custom_css
+from app_data import calculate_risk_level, get_inference_engine, predict_tuberculosis, save_patient_data
+from inference import MAPPING
+
+
+def diagnostic_page(engine):
+    inject_custom_css()
+    
+    # En-tête amélioré
+    st.markdown("""
+    <div class='main-header'>
+        <h1 style='color: white; margin: 0;'>🩺 Diagnostic de la Tuberculose</h1>
+        <p style='color: white; opacity: 0.9; margin: 0;'>Évaluation complète des patients et analyse des risques</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Formulaire en deux colonnes avec cartes
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        # Informations patient dans une carte
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.header("👤 Informations du Patient")
+        
+        subcol1, subcol2, subcol3 = st.columns(3)
+        with subcol1:
+            cin = st.text_input("**CIN**", placeholder="AB123456", key="cin")
+            nom = st.text_input("**Nom**", placeholder="DUPONT", key="nom")
+        with subcol2:
+            prenom = st.text_input("**Prénom**", placeholder="Jean", key="prenom")
+            age = st.slider("**Âge**", 1, 100, 35, key="age")
+        with subcol3:
+            genre = st.selectbox("**Genre**", ["Homme", "Femme"], key="genre")
+            medecin = st.text_input("**Médecin traitant**", 
+                                  value=current_user()['name'],
+                                  key="medecin")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Données anthropométriques dans une carte
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.subheader("📊 Données Anthropométriques")
+        anthro_col1, anthro_col2, anthro_col3 = st.columns(3)
+        with anthro_col1:
+            poids = st.number_input("**Poids (kg)**", 30.0, 200.0, 70.0, step=0.5, key="poids")
+        with anthro_col2:
+            taille = st.number_input("**Taille (cm)**", 100.0, 220.0, 170.0, step=1.0, key="taille")
+        with anthro_col3:
+            if taille > 0:
+                imc = poids / ((taille/100) ** 2)
+                st.metric("**IMC**", f"{imc:.1f}", 
+                         delta="Normal" if 18.5 <= imc <= 24.9 else "Attention")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Symptômes cliniques dans des cartes
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.header("🩺 Symptômes Cliniques")
+        
+        st.subheader("🫁 Symptômes Respiratoires")
+        resp_col1, resp_col2, resp_col3 = st.columns(3)
+        with resp_col1:
+            intensite_toux = st.slider("**Intensité de la toux**", 0, 10, 0, key="toux")
+            essoufflement = st.slider("**Essoufflement**", 0, 10, 0, key="essoufflement")
+        with resp_col2:
+            douleur_thoracique = st.selectbox("**Douleur thoracique**", 
+                                            ["Aucune", "Légère", "Modérée", "Sévère"], key="douleur")
+            production_crachats = st.selectbox("**Production de crachats**", 
+                                             ["Aucune", "Faible", "Moyenne", "Importante"], key="crachats")
+        with resp_col3:
+            sang_crachats = st.selectbox("**Sang dans les crachats**", 
+                                       ["Non", "Oui", "Abondant"], key="sang")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+        st.subheader("🌡️ Symptômes Généraux")
+        gen_col1, gen_col2, gen_col3 = st.columns(3)
+        with gen_col1:
+            fievre = st.selectbox("**Fièvre**", 
+                                ["Absente", "<38°C", "38-39°C", ">39°C"], key="fievre")
+            fatigue = st.slider("**Fatigue**", 0, 10, 0, key="fatigue")
+        with gen_col2:
+            sueurs_nocturnes = st.selectbox("**Sueurs nocturnes**", 
+                                          ["Non", "Occasionnelles", "Fréquentes", "Très fréquentes"], key="sueurs")
+            perte_poids = st.slider("**Perte de poids (kg)**", 0.0, 20.0, 0.0, step=0.5, key="perte_poids")
+        with gen_col3:
+            tabagisme = st.selectbox("**Tabagisme**", 
+                                   ["Jamais fumé", "Ancien fumeur", "<10/jour", ">10/jour"], key="tabagisme")
+            antecedents_tb = st.selectbox("**Antécédents TB**", 
+                                        ["Non", "Oui, traité", "Oui, récurrent"], key="antecedents")
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2:
+        # Panneau de contrôle latéral
+        st.markdown("<div class='custom-card' style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white;'>", 
+                   unsafe_allow_html=True)
+        st.subheader("🎯 Contrôles")
+        st.markdown("""
+        <div style='color: white;'>
+        <p>Remplissez tous les champs obligatoires et cliquez sur le bouton pour lancer le diagnostic.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Indicateur de complétion
+        champs_obligatoires = [cin, nom, prenom]
+        completion = sum(1 for champ in champs_obligatoires if champ) / len(champs_obligatoires) * 100
+        st.metric("**Complétion du formulaire**", f"{completion:.0f}%")
+        st.progress(int(completion))
+        
+        # Bouton de diagnostic stylisé
+        if st.button("**🎯 Lancer le Diagnostic**", use_container_width=True, type="primary"):
+            if completion < 100:
+                st.error("Veuillez remplir tous les champs obligatoires (*)")
+            else:
+                # Préparation des données
+                input_data = {
+                    'age': age,
+                    'genre': MAPPING['Genre'][genre],
+                    'douleur_thoracique': MAPPING['Douleur_Thoracique'][douleur_thoracique],
+                    'intensite_toux': intensite_toux,
+                    'essoufflement': essoufflement,
+                    'fatigue': fatigue,
+                    'perte_poids': perte_poids,
+                    'fievre': MAPPING['Fievre'][fievre],
+                    'sueurs_nocturnes': MAPPING['Sueurs_Nocturnes'][sueurs_nocturnes],
+                    'production_crachats': MAPPING['Production_Crachats'][production_crachats],
+                    'sang_crachats': MAPPING['Sang_Crachats'][sang_crachats],
+                    'tabagisme': MAPPING['Tabagisme'][tabagisme],
+                    'antecedents_tb': MAPPING['Antecedents_TB'][antecedents_tb]
+                }
+                
+                # Prédiction
+                with st.spinner("🔍 Analyse des symptômes en cours..."):
+                    prediction, probability = predict_tuberculosis(input_data)
+                    niveau_risque, couleur_risque, emoji_risque = calculate_risk_level(probability)
+                
+                # Affichage résultats dans la sidebar
+                st.markdown("</div>", unsafe_allow_html=True)
+                st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+                st.subheader("📊 Résultats")
+                
+                # Badge de risque
+                risk_class = f"risk-{niveau_risque.lower()}"
+                st.markdown(f"""
+                <div class='risk-badge {risk_class}'>
+                    {emoji_risque} Niveau de Risque: {niveau_risque}
+                </div>
+                """, unsafe_allow_html=True)
+                
+                st.metric("**Probabilité**", f"{probability:.1%}")
+                st.metric("**Recommandation**", 
+                         "🔴 Consultation urgente" if prediction == 1 else "🟢 Surveillance")
+                model = get_inference_engine()
+                if model.fallback:
+                    st.warning(f"⚠️ Modèle indisponible, score calculé par les règles cliniques ({model.load_error})")
+                else:
+                    st.caption(f"🧠 Modèle: {model.source}")
+                
+                # Jauge de risque
+                fig_gauge = go.Figure(go.Indicator(
+                    mode="gauge+number",
+                    value=probability * 100,
+                    title={'text': f"Niveau de Risque - {niveau_risque}"},
+                    gauge={
+                        'axis': {'range': [0, 100]},
+                        'bar': {'color': couleur_risque},
+                        'steps': [
+                            {'range': [0, 30], 'color': "lightgreen"},
+                            {'range': [30, 70], 'color': "yellow"},
+                            {'range': [70, 100], 'color': "red"}],
+                    }
+                ))
+                fig_gauge.update_layout(height=250)
+                st.plotly_chart(fig_gauge, use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                
+                # Graphique radar
+                st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+                st.subheader("📈 Profil des Symptômes")
+                symptoms_data = {
+                    'Symptôme': ['Toux', 'Essoufflement', 'Fatigue', 'Douleur thoracique', 'Fièvre', 'Perte poids'],
+                    'Intensité': [
+                        intensite_toux, essoufflement, fatigue,
+                        MAPPING['Douleur_Thoracique'][douleur_thoracique],
+                        MAPPING['Fievre'][fievre], perte_poids * 2
+                    ]
+                }
+                
+                fig_radar = go.Figure()
+                fig_radar.add_trace(go.Scatterpolar(
+                    r=symptoms_data['Intensité'],
+                    theta=symptoms_data['Symptôme'],
+                    fill='toself',
+                    name='Symptômes',
+                    fillcolor='rgba(102, 126, 234, 0.3)',
+                    line=dict(color='rgb(102, 126, 234)')
+                ))
+                fig_radar.update_layout(
+                    polar=dict(radialaxis=dict(visible=True, range=[0, 10])), 
+                    height=300,
+                    showlegend=False
+                )
+                st.plotly_chart(fig_radar, use_container_width=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                
+                # Recommandations
+                st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+                st.subheader("💡 Plan de Prise en Charge")
+                if prediction == 1:
+                    st.error("""
+                    **🔴 Actions Immédiates:**
+                    - Consultation médicale urgente
+                    - Radiographie thoracique
+                    - Examen des crachats
+                    - Isolement préventif
+                    - Déclaration aux autorités
+                    """)
+                else:
+                    st.success("""
+                    **🟢 Surveillance Standard:**
+                    - Contrôle dans 1 mois
+                    - Surveillance des symptômes
+                    - Mesures d'hygiène
+                    - Consultation si aggravation
+                    """)
+                st.markdown("</div>", unsafe_allow_html=True)
+                
+                # Sauvegarde des données
+                patient_data = {
+                    "cin": cin, "nom": nom, "prenom": prenom, "age": age,
+                    "genre": genre, "poids": poids, "taille": taille, "imc": imc,
+                    "douleur_thoracique": douleur_thoracique, "intensite_toux": intensite_toux,
+                    "essoufflement": essoufflement, "production_crachats": production_crachats,
+                    "sang_crachats": sang_crachats, "fievre": fievre, "fatigue": fatigue,
+                    "sueurs_nocturnes": sueurs_nocturnes, "perte_poids": perte_poids,
+                    "tabagisme": tabagisme, "antecedents_tb": antecedents_tb,
+                    "prediction": prediction, "probabilite": probability,
+                    "niveau_risque": niveau_risque, "medecin_traitant": medecin,
+                    "date_consultation": date.today()
+                }
+                
+                if save_patient_data(engine, patient_data):
+                    st.success("✅ Données sauvegardées avec succès!")
+                else:
+                    st.warning("⚠️ Données sauvegardées en session (base de données non disponible)")
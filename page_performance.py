@@ -0,0 +1,87 @@
+# page_performance.py - Page d'administration: latence par étape, export Prometheus et profilage
+import os
+
+import streamlit as st
+
+from app_common import current_user, inject_custom_css, session_id
+from instrumentation import RECORDER
+
+
+def _format_bound(bound):
+    """Borne de compartiment -> '≤ 250 ms' (les quantiles sont des estimations par compartiment)"""
+    if bound is None:
+        return "-"
+    return "> max" if bound == float('inf') else f"≤ {bound:g} ms"
+
+
+def stage_table(snapshot):
+    """Lignes du tableau des étapes, de la plus coûteuse au total à la moins coûteuse"""
+    rows = [{
+        'Étape': stage,
+        'Appels': stats['count'],
+        'Moyenne (ms)': round(stats['mean'], 1) if stats['mean'] is not None else None,
+        'p50': _format_bound(stats['p50']),
+        'p95': _format_bound(stats['p95']),
+        'p99': _format_bound(stats['p99']),
+        'Total (s)': round(stats['sum'] / 1000, 2),
+    } for stage, stats in snapshot.items() if stats['count']]
+    return sorted(rows, key=lambda row: row['Total (s)'], reverse=True)
+
+
+def performance_page(engine):
+    inject_custom_css()
+
+    # En-tête amélioré
+    st.markdown("""
+    <div class='main-header'>
+        <h1 style='color: white; margin: 0;'>⏱️ Performance</h1>
+        <p style='color: white; opacity: 0.9; margin: 0;'>Latence des pages, des accès aux données et du modèle</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if current_user()['role'] != 'admin':
+        st.error("❌ Page réservée aux administrateurs")
+        return
+
+    # Latence par étape
+    st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+    st.subheader("📈 Latence par Étape")
+    scope = st.radio("**Périmètre**", ["Cette session", "Toutes les sessions"], horizontal=True, key="perf_scope")
+    snapshot = RECORDER.snapshot(session_id() if scope == "Cette session" else None)
+    rows = stage_table(snapshot)
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        st.caption("p50/p95/p99: borne supérieure du compartiment de l'histogramme contenant le quantile")
+    else:
+        st.info("📊 Aucune mesure pour le moment: parcourez les autres pages")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Export Prometheus", RECORDER.prometheus(), file_name="tb_metrics.prom",
+                           mime="text/plain", use_container_width=True)
+    with col2:
+        if st.button("🗑️ Réinitialiser les mesures", use_container_width=True, key="perf_reset"):
+            RECORDER.reset(session_id() if scope == "Cette session" else None)
+            st.rerun()
+    port = os.environ.get("TB_METRICS_PORT")
+    if port:
+        host = os.environ.get("TB_METRICS_HOST", "127.0.0.1")
+        st.caption(f"🔌 Point de collecte Prometheus: http://{host}:{port}/metrics "
+                   "(TB_METRICS_HOST pour écouter sur une autre interface)")
+    else:
+        st.caption("🔌 Définir TB_METRICS_PORT pour exposer /metrics à Prometheus")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+    # Profilage cProfile de la prochaine page affichée
+    st.markdown("<div class='custom-card'>", unsafe_allow_html=True)
+    st.subheader("🧪 Profilage")
+    if st.session_state.get('profile_next_run'):
+        st.info("⏳ La prochaine page ouverte sera profilée")
+    elif st.button("🧪 Profiler la prochaine exécution", use_container_width=True, key="perf_profile"):
+        st.session_state.profile_next_run = True
+        st.rerun()
+    if st.session_state.get('last_profile'):
+        page, report = st.session_state.last_profile
+        st.caption(f"Dernier profil: {page} (fonctions triées par temps cumulé)")
+        st.code(report, language=None)
+    st.markdown("</div>", unsafe_allow_html=True)
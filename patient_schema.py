@@ -0,0 +1,108 @@
+# patient_schema.py - Types compacts du DataFrame des patients (catégories fixes, int8/float32)
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from inference import MAPPING
+
+# Catégories fixes dans l'ordre des codes du formulaire: .cat.codes == MAPPING[...]
+CATEGORIES = {
+    column.lower(): pd.CategoricalDtype(sorted(codes, key=codes.get), ordered=column != 'Genre')
+    for column, codes in MAPPING.items()
+}
+CATEGORIES['niveau_risque'] = pd.CategoricalDtype(['Faible', 'Modéré', 'Élevé'], ordered=True)
+
+# Entiers bornés: int8 sans valeur manquante, float32 sinon
+INT8_COLUMNS = ['age', 'intensite_toux', 'essoufflement', 'fatigue', 'prediction']
+FLOAT32_COLUMNS = ['poids', 'taille', 'imc', 'perte_poids', 'probabilite']
+ID_COLUMN = 'id'
+
+ROWS_PER_REPORT = 100000
+
+
+def _categorical(series, dtype):
+    # Une valeur hors du formulaire est conservée comme catégorie supplémentaire
+    unknown = pd.Index(series.dropna().unique()).difference(dtype.categories)
+    if len(unknown):
+        dtype = pd.CategoricalDtype(list(dtype.categories) + sorted(unknown, key=str), ordered=dtype.ordered)
+    return series.astype(dtype)
+
+
+def _extends(dtype, base):
+    """Vrai si `dtype` reprend les catégories fixes de `base` (éventuellement complétées)"""
+    return (isinstance(dtype, pd.CategoricalDtype) and dtype.ordered == base.ordered
+            and list(dtype.categories[:len(base.categories)]) == list(base.categories))
+
+
+def _downcast(series, dtype):
+    values = pd.to_numeric(series, errors='coerce')
+    if dtype == np.int8:
+        info = np.iinfo(np.int8)
+        if values.isna().any() or not values.between(info.min, info.max).all() or (values % 1 != 0).any():
+            dtype = np.float32
+    return values.astype(dtype)
+
+
+def compact_patients(df):
+    """Nouveau DataFrame typé selon le schéma (le DataFrame d'entrée n'est pas modifié)"""
+    columns = {}
+    for col in df.columns:
+        if col in CATEGORIES:
+            # Une catégorie dans l'ordre d'apparition (ex. dictionnaire Arrow) est recodée
+            if not _extends(df[col].dtype, CATEGORIES[col]):
+                columns[col] = _categorical(df[col], CATEGORIES[col])
+        elif col in INT8_COLUMNS and df[col].dtype != np.int8:
+            columns[col] = _downcast(df[col], np.int8)
+        elif col in FLOAT32_COLUMNS and df[col].dtype != np.float32:
+            columns[col] = _downcast(df[col], np.float32)
+        elif col == ID_COLUMN and pd.api.types.is_integer_dtype(df[col]) and df[col].dtype != np.int32:
+            columns[col] = df[col].astype(np.int32)
+    return df.assign(**columns) if columns else df
+
+
+def append_compact(df, new_rows):
+    """Concatène des lignes déjà typées en conservant les dtypes compacts"""
+    combined = pd.concat([df, new_rows], ignore_index=True)
+    # Catégories différentes (valeur hors formulaire): pandas retombe sur object
+    if any(combined[col].dtype == object for col in CATEGORIES if col in combined.columns):
+        combined = compact_patients(combined)
+    return combined
+
+
+def memory_per_rows(df, rows=ROWS_PER_REPORT):
+    """Mémoire (octets, chaînes comprises) ramenée à `rows` patients"""
+    if not len(df):
+        return 0
+    return int(df.memory_usage(deep=True).sum() / len(df) * rows)
+
+
+def memory_report(df):
+    """Mémoire pour 100k patients avant/après typage compact"""
+    compact = compact_patients(df)
+    before, after = memory_per_rows(df), memory_per_rows(compact)
+    return {
+        'rows': len(df),
+        'before_mb': before / 1e6,
+        'after_mb': after / 1e6,
+        'ratio': before / after if after else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mémoire du DataFrame patients pour 100k lignes, avant/après typage")
+    parser.add_argument("--db", default=os.environ.get("TB_SQLITE_PATH", "data/tb_database.db"),
+                        help="base SQLite à lire")
+    args = parser.parse_args(argv)
+
+    df = pd.read_sql("SELECT * FROM patients", con=create_engine(f"sqlite:///{args.db}"))
+    report = memory_report(df)
+    print(f"{report['rows']} patients lus")
+    print(f"avant: {report['before_mb']:.1f} Mo / 100k patients")
+    print(f"après: {report['after_mb']:.1f} Mo / 100k patients (÷{report['ratio']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
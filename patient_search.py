@@ -0,0 +1,97 @@
+# patient_search.py - Recherche indexée des patients (FTS5 SQLite, index préfixe MySQL)
+import re
+
+import pandas as pd
+from sqlalchemy import text
+
+from data_access import PAGE_SIZE
+
+SEARCH_COLUMNS = ['cin', 'nom', 'prenom', 'medecin_traitant']
+LIKE_ESCAPE = "\\"
+
+
+# =============================================================================
+# 🔹 RECHERCHE
+# =============================================================================
+def _has_fts(engine):
+    """Vrai si la migration 5 a créé patients_fts (SQLite compilé avec FTS5)"""
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patients_fts'"
+        )).first() is not None
+
+
+def _fts_query(term):
+    """Transforme la saisie en requête FTS5: chaque mot est un préfixe obligatoire"""
+    tokens = re.findall(r"\w+", term)
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def _like_prefix(term):
+    """Motif LIKE préfixe: %, _ et le caractère d'échappement saisis sont pris littéralement"""
+    return re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+def search_patients(engine, term, page=0, page_size=PAGE_SIZE):
+    """Retourne (page de résultats classés par pertinence, il existe une page suivante)
+
+    Un CIN exact est résolu par l'index sur `cin`. Sinon la recherche passe par
+    FTS5 (classement bm25) sous SQLite ou par des LIKE préfixe indexés sous MySQL.
+    L'index de recherche est créé par la migration 5.
+    """
+    term = term.strip()
+    if not term:
+        return pd.DataFrame(), False
+
+    exact = pd.read_sql(text("SELECT * FROM patients WHERE cin = :cin ORDER BY id"),
+                        con=engine, params={"cin": term})
+    if not exact.empty:
+        return exact, False
+
+    limit = page_size + 1
+    offset = page * page_size
+    results = None
+
+    # SQLite sans FTS5: recherche LIKE
+    if engine.dialect.name == 'sqlite' and _has_fts(engine):
+        query = _fts_query(term)
+        if not query:
+            return pd.DataFrame(), False
+        results = pd.read_sql(text("""
+            SELECT p.* FROM patients_fts
+            JOIN patients p ON p.id = patients_fts.rowid
+            WHERE patients_fts MATCH :query
+            ORDER BY bm25(patients_fts, 10.0, 5.0, 5.0, 1.0), p.id
+            LIMIT :limit OFFSET :offset
+        """), con=engine, params={"query": query, "limit": limit, "offset": offset})
+
+    if results is None:
+        results = pd.read_sql(text("""
+            SELECT * FROM patients
+            WHERE cin LIKE :prefix ESCAPE :escape OR nom LIKE :prefix ESCAPE :escape
+               OR prenom LIKE :prefix ESCAPE :escape OR medecin_traitant LIKE :prefix ESCAPE :escape
+            ORDER BY CASE
+                WHEN cin LIKE :prefix ESCAPE :escape THEN 0
+                WHEN nom = :term OR prenom = :term THEN 1
+                WHEN nom LIKE :prefix ESCAPE :escape OR prenom LIKE :prefix ESCAPE :escape THEN 2
+                ELSE 3
+            END, id
+            LIMIT :limit OFFSET :offset
+        """), con=engine, params={"term": term, "prefix": _like_prefix(term), "escape": LIKE_ESCAPE,
+                                    "limit": limit, "offset": offset})
+
+    return results.head(page_size), len(results) > page_size
+
+
+def search_frame(df, term, page=0, page_size=PAGE_SIZE):
+    """Même recherche sur un DataFrame en mémoire (mode session sans base)"""
+    term = term.strip()
+    columns = [col for col in SEARCH_COLUMNS if col in df.columns]
+    if not term or not columns:
+        return df.iloc[0:0], False
+    mask = pd.Series(False, index=df.index)
+    for col in columns:
+        mask |= df[col].astype(str).str.contains(term, case=False, regex=False, na=False)
+    matches = df[mask]
+    start = page * page_size
+    return matches.iloc[start:start + page_size], len(matches) > start + page_size
@@ -0,0 +1,270 @@
+# patient_snapshot.py - Instantané colonne (Arrow IPC) de la table patients, lu par memory-map
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from data_access import fetch_patients_after
+from patient_schema import CATEGORIES, INT8_COLUMNS, append_compact, compact_patients
+from write_queue import journal_lock
+
+SNAPSHOT_DIR = os.environ.get("TB_SNAPSHOT_DIR", "data/snapshot")
+SNAPSHOT_TTL = int(os.environ.get("TB_SNAPSHOT_TTL", 300))  # secondes
+BATCH_SIZE = 50000
+# Au-delà, les fichiers d'une partition sont fusionnés en un seul
+MAX_FILES_PER_PARTITION = 16
+UNKNOWN_PARTITION = "inconnu"
+
+_TEXT_COLUMNS = ['cin', 'nom', 'prenom', 'genre', 'douleur_thoracique', 'production_crachats', 'sang_crachats',
+                 'fievre', 'sueurs_nocturnes', 'tabagisme', 'antecedents_tb', 'niveau_risque', 'medecin_traitant',
+                 'created_at']
+_NUMERIC_COLUMNS = ['age', 'poids', 'taille', 'imc', 'intensite_toux', 'essoufflement', 'fatigue', 'perte_poids',
+                    'prediction', 'probabilite']
+
+# Schéma fixe: tous les fichiers de l'instantané se concatènent sans conversion
+SCHEMA = pa.schema(
+    [('id', pa.int64())]
+    + [(col, pa.string()) for col in _TEXT_COLUMNS]
+    + [(col, pa.float32()) for col in _NUMERIC_COLUMNS]
+    + [('date_consultation', pa.date32())]
+)
+
+
+def _to_arrow(rows):
+    """Lignes brutes de la table patients -> table Arrow au schéma fixe"""
+    columns = {}
+    for field in SCHEMA:
+        values = rows[field.name] if field.name in rows.columns else pd.Series(None, index=rows.index)
+        if field.name == 'date_consultation':
+            values = pd.to_datetime(values, errors='coerce').dt.date
+        elif field.name in _NUMERIC_COLUMNS:
+            values = pd.to_numeric(values, errors='coerce')
+        elif field.name != 'id':
+            values = values.where(values.isna(), values.astype(str))
+        columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+    return pa.table(columns, schema=SCHEMA)
+
+
+def _compact_column(name, column):
+    """Colonne Arrow convertie vers son type compact avant le passage en pandas"""
+    if name in CATEGORIES:
+        # pandas reçoit directement des codes (Categorical) au lieu d'objets str
+        return pc.dictionary_encode(column)
+    target = pa.int8() if name in INT8_COLUMNS else pa.int32() if name == 'id' else None
+    if target is not None and column.null_count == 0:
+        try:
+            return column.cast(target)   # conversion sûre: échoue si une valeur ne tient pas
+        except pa.ArrowInvalid:
+            pass
+    return column
+
+
+def _frame(table, columns=None):
+    """DataFrame compact des colonnes demandées: chaque colonne n'est matérialisée qu'une fois"""
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    table = pa.table([_compact_column(name, table[name]) for name in table.column_names],
+                     names=table.column_names)
+    # compact_patients ne fait plus que fixer l'ordre des catégories
+    return compact_patients(table.to_pandas(date_as_object=False, split_blocks=True))
+
+
+def _partition(value):
+    return UNKNOWN_PARTITION if pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m")
+
+
+def _read_mapped(path):
+    """Table Arrow adossée au fichier par memory-map (aucune copie des colonnes)"""
+    # Les buffers retournés gardent la projection ouverte
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _write_file(table, path):
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+class PatientSnapshot:
+    """Copie colonne de la table patients pour les vues analytiques
+
+    Les lignes sont écrites en fichiers Arrow IPC non compressés, partitionnés
+    par mois de `date_consultation` (`mois=AAAA-MM/part-<premier id>.arrow`),
+    puis relues par memory-map. Seules les lignes d'id supérieur au dernier id
+    exporté sont lues dans la base, au plus une fois par `ttl` secondes ou
+    après `invalidate()`. L'instantané survit aux redémarrages et est reconstruit
+    si la base source change. Le DataFrame retourné est matérialisé une fois
+    depuis les tables projetées (types compacts appliqués côté Arrow) et
+    partagé: ne jamais le modifier en place. Export, fusion et relecture se
+    font sous un verrou fcntl (`_snapshot.lock`) partagé par les processus.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, ttl=SNAPSHOT_TTL, batch_size=BATCH_SIZE):
+        self.directory = directory
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.df = None
+        self.refreshed_at = 0.0
+        self.stale = True
+        self._lock = threading.Lock()
+        self.meta = self._read_meta()
+
+    # -------------------------------------------------------------------------
+    def invalidate(self):
+        self.stale = True
+
+    def get(self, engine):
+        """DataFrame typé de l'instantané, complété des nouvelles lignes si nécessaire"""
+        with self._lock:
+            if self.df is not None and not self.stale and time.monotonic() - self.refreshed_at < self.ttl:
+                return self.df
+
+            with self._file_lock():
+                self._sync(engine)
+                if self.df is None:
+                    self.df = self._load()
+                new_rows = self._export(engine)
+            if new_rows is not None:
+                self.df = append_compact(self.df, _frame(new_rows))
+            self.refreshed_at = time.monotonic()
+            self.stale = False
+            return self.df
+
+    def refresh(self, engine):
+        """Exporte les nouvelles lignes sans charger l'instantané; retourne leur nombre"""
+        with self._lock, self._file_lock():
+            return self._refresh(engine)
+
+    def rebuild(self, engine):
+        """Supprime et réexporte tout l'instantané"""
+        with self._lock, self._file_lock():
+            self._clear(engine)
+            return self._refresh(engine)
+
+    def load(self, columns=None):
+        """Relit les fichiers de l'instantané (memory-map) en DataFrame typé, limité à `columns`"""
+        with self._file_lock():
+            return self._load(columns)
+
+    def status(self):
+        return {
+            'rows': self.meta.get('rows', 0),
+            'last_id': self.meta.get('last_id', 0),
+            'files': len(self._files()),
+            'exported_at': self.meta.get('exported_at'),
+        }
+
+    # -------------------------------------------------------------------------
+    def _file_lock(self):
+        """Verrou entre processus: un seul exporte ou fusionne, aucun ne relit une fusion en cours"""
+        return journal_lock(os.path.join(self.directory, "_snapshot"))
+
+    def _load(self, columns=None):
+        tables = [_read_mapped(path) for path in self._files()]
+        return _frame(pa.concat_tables(tables) if tables else SCHEMA.empty_table(), columns)
+
+    def _refresh(self, engine):
+        self._sync(engine)
+        new_rows = self._export(engine)
+        if self.df is not None and new_rows is not None:
+            self.df = append_compact(self.df, _frame(new_rows))
+        return 0 if new_rows is None else new_rows.num_rows
+
+    def _export(self, engine):
+        """Écrit les lignes d'id > last_id par lots; retourne la table Arrow exportée (ou None)"""
+        exported = []
+        while True:
+            rows = fetch_patients_after(engine, self.meta['last_id'], self.batch_size)
+            if rows.empty:
+                break
+            table = _to_arrow(rows)
+            partitions = rows['date_consultation'].map(_partition) if 'date_consultation' in rows else None
+            for partition in (partitions.unique() if partitions is not None else [UNKNOWN_PARTITION]):
+                mask = (partitions == partition).to_numpy() if partitions is not None else None
+                part = table.filter(pa.array(mask)) if mask is not None else table
+                directory = os.path.join(self.directory, f"mois={partition}")
+                os.makedirs(directory, exist_ok=True)
+                _write_file(part, os.path.join(directory, f"part-{part['id'][0].as_py():012d}.arrow"))
+                self._compact_partition(directory)
+
+            self.meta.update(last_id=int(rows['id'].max()), rows=self.meta['rows'] + len(rows),
+                             exported_at=time.time())
+            self._write_meta()
+            exported.append(table)
+            if len(rows) < self.batch_size:
+                break
+        return pa.concat_tables(exported) if exported else None
+
+    def _sync(self, engine):
+        """Reprend l'état écrit sur disque (autre processus) ou repart de zéro si la base a changé"""
+        meta = self._read_meta()
+        if meta.get('source') != _source(engine):
+            self._clear(engine)
+        elif meta.get('last_id', 0) != self.meta.get('last_id'):
+            self.meta, self.df = meta, None
+
+    def _compact_partition(self, directory):
+        files = sorted(glob.glob(os.path.join(directory, "part-*.arrow")))
+        if len(files) <= MAX_FILES_PER_PARTITION:
+            return
+        table = pa.concat_tables([_read_mapped(path) for path in files])
+        _write_file(table, files[0])
+        for path in files[1:]:
+            os.remove(path)
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.directory, "mois=*", "part-*.arrow")))
+
+    def _clear(self, engine):
+        for path in self._files():
+            os.remove(path)
+        self.df = None
+        self.meta = {'source': _source(engine), 'last_id': 0, 'rows': 0, 'exported_at': None}
+        self._write_meta()
+
+    def _meta_path(self):
+        return os.path.join(self.directory, "_snapshot.json")
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._meta_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path())
+
+
+def _source(engine):
+    return engine.url.render_as_string(hide_password=True)
+
+
+def main(argv=None):
+    from connection_manager import ConnectionManager
+
+    parser = argparse.ArgumentParser(description="Exporte les nouveaux patients dans l'instantané colonne")
+    parser.add_argument("--rebuild", action="store_true", help="réexporter toute la table")
+    args = parser.parse_args(argv)
+
+    manager = ConnectionManager.from_env(health_interval=0)
+    if manager.engine is None:
+        raise SystemExit("Aucune base de données disponible")
+    snapshot = PatientSnapshot()
+    rows = snapshot.rebuild(manager.engine) if args.rebuild else snapshot.refresh(manager.engine)
+    print(f"{rows} patients exportés · {snapshot.status()}")
+
+
+if __name__ == "__main__":
+    main()
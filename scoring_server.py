@@ -0,0 +1,184 @@
+# scoring_server.py - Serveur de scoring asyncio avec regroupement des requêtes en micro-lots
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from inference import ValidationError, encode_patients, get_engine, risk_levels
+from metrics import Histogram, power_of_two_buckets
+
+# Un lot part dès qu'il atteint MAX_BATCH patients ou MAX_WAIT_MS après sa première requête
+MAX_BATCH = int(os.environ.get("TB_BATCH_MAX_SIZE", 64))
+MAX_WAIT_MS = float(os.environ.get("TB_BATCH_MAX_WAIT_MS", 5))
+# Patients acceptés par requête (même limite par défaut que TB_API_MAX_BATCH)
+MAX_PATIENTS = int(os.environ.get("TB_SCORING_MAX_PATIENTS", 1000))
+
+
+class MicroBatcher:
+    """Regroupe les requêtes concurrentes d'un patient en un seul appel predict_proba
+
+    Chaque appel à `score(x)` dépose sa ligne dans une file asyncio et attend son
+    propre résultat. Une tâche de fond vide la file par lots; le scoring tourne
+    dans un thread dédié pour que la boucle continue d'accepter des requêtes
+    pendant le calcul du lot précédent.
+    """
+
+    def __init__(self, engine, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = Histogram(power_of_two_buckets(max_batch))
+        self.latency_ms = Histogram()
+        self.batch_ms = Histogram()
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=False)
+
+    async def score(self, x):
+        """(prédiction, probabilité) d'une ligne FEATURE_COLUMNS"""
+        future = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        await self._queue.put((x, future))
+        result = await future
+        self.latency_ms.observe((time.perf_counter() - started) * 1000)
+        return result
+
+    def metrics(self):
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batch_size': self.batch_sizes.snapshot(),
+            'latency_ms': self.latency_ms.snapshot(),
+            'batch_ms': self.batch_ms.snapshot(),
+        }
+
+    # -------------------------------------------------------------------------
+    async def _collect(self):
+        """Attend une première requête puis complète le lot jusqu'à la taille ou au délai maximal"""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Requêtes déjà arrivées: pas d'attente
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - asyncio.get_running_loop().time()
+            if len(batch) >= self.max_batch or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            futures = [future for _, future in batch]
+            started = time.perf_counter()
+            try:
+                X = np.vstack([x for x, _ in batch])
+                predictions, probabilities = await loop.run_in_executor(self._executor, self.engine.predict, X)
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batch_ms.observe((time.perf_counter() - started) * 1000)
+            self.batch_sizes.observe(len(batch))
+            for future, prediction, probability in zip(futures, predictions, probabilities):
+                if not future.done():   # client parti entre-temps
+                    future.set_result((int(prediction), float(probability)))
+
+
+def create_app(engine=None, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_patients=MAX_PATIENTS):
+    """Application ASGI: POST /predict (un patient ou un tableau), GET /metrics, GET /health"""
+    engine = engine or get_engine()
+    batcher = MicroBatcher(engine, max_batch, max_wait_ms)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await batcher.start()
+        yield
+        await batcher.stop()
+
+    async def predict(request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            return JSONResponse({'error': "JSON invalide"}, status_code=400)
+        single = isinstance(payload, dict)
+        patients = [payload] if single else payload
+        if not isinstance(patients, list) or not patients:
+            return JSONResponse({'error': "objet patient ou tableau non vide attendu"}, status_code=400)
+        if len(patients) > max_patients:
+            return JSONResponse({'error': f"au plus {max_patients} patients par requête"}, status_code=413)
+        try:
+            X = encode_patients(patients)
+        except ValidationError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        # Les lignes d'un tableau rejoignent les micro-lots comme des requêtes distinctes
+        scored = await asyncio.gather(*(batcher.score(x) for x in X))
+        levels = risk_levels([probability for _, probability in scored])
+        results = [
+            {'prediction': prediction, 'probabilite': probability, 'niveau_risque': str(level)}
+            for (prediction, probability), level in zip(scored, levels)
+        ]
+        return JSONResponse(results[0] if single else results)
+
+    async def metrics(request):
+        return JSONResponse(batcher.metrics())
+
+    async def health(request):
+        return JSONResponse({'status': 'ok', 'model': engine.source, 'model_error': engine.load_error})
+
+    app = Starlette(routes=[
+        Route("/predict", predict, methods=["POST"]),
+        Route("/metrics", metrics),
+        Route("/health", health),
+    ], lifespan=lifespan)
+    app.state.batcher = batcher
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serveur de scoring asyncio avec micro-lots")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface d'écoute (sans authentification: 0.0.0.0 derrière un proxy seulement)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("TB_SCORING_PORT", 8001)))
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="taille maximale d'un micro-lot")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="attente maximale après la première requête d'un lot (ms)")
+    parser.add_argument("--max-patients", type=int, default=MAX_PATIENTS,
+                        help="patients acceptés par requête (au-delà: 413)")
+    args = parser.parse_args(argv)
+
+    uvicorn.run(create_app(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, max_patients=args.max_patients),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# train.py - Entraînement reproductible du modèle (remplace tuberculosis.ipynb)
+#
+#   python train.py                       # TUBERCULOSE.CSV -> models/tb_pipeline-<version>.joblib
+#   python train.py --csv autre.csv --models logistic_regression knn
+#   python train.py --force               # met à jour LATEST même sous le seuil d'AUC
+import argparse
+import hashlib
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import LogisticRegression
+from sklearn.base import clone
+from sklearn.metrics import (accuracy_score, confusion_matrix, f1_score, precision_recall_curve, precision_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, cross_val_predict, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from batch_scoring import encode_chunk
+from inference import ARTIFACT_DIR, FEATURE_COLUMNS, INPUT_CODES, LATEST_FILE, latest_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, "TUBERCULOSE.CSV")
+CACHE_DIR = os.environ.get("TB_TRAIN_CACHE", os.path.join(BASE_DIR, "data", "train_cache"))
+
+TARGET = 'Class'
+POSITIVE_CLASS = 'Tuberculosis'
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+CV_FOLDS = 5
+SCORING = ('roc_auc', 'f1', 'accuracy')
+REFIT = 'roc_auc'
+# LATEST n'est mis à jour que si l'AUC de test atteint ce seuil (0.5: hasard) et celle du modèle en place
+MIN_AUC = float(os.environ.get("TB_MIN_AUC", 0.6))
+
+# Modèles comparés dans le notebook et leurs grilles d'hyperparamètres.
+# Les classes sont pondérées plutôt que rééchantillonnées (SMOTE n'est pas
+# une dépendance de l'application) ; KNN n'accepte pas de poids de classe.
+CANDIDATES = {
+    'logistic_regression': (
+        lambda: LogisticRegression(max_iter=1000, class_weight='balanced'),
+        {'C': [0.01, 0.1, 1.0, 10.0]},
+    ),
+    'knn': (
+        lambda: KNeighborsClassifier(),
+        {'n_neighbors': [5, 15, 31], 'weights': ['uniform', 'distance']},
+    ),
+    'decision_tree': (
+        lambda: DecisionTreeClassifier(class_weight='balanced', random_state=RANDOM_STATE),
+        {'max_depth': [4, 8, 12], 'min_samples_leaf': [1, 20]},
+    ),
+}
+
+
+# =============================================================================
+# 🔹 DONNÉES
+# =============================================================================
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_dataset(path=DATA_PATH):
+    """(matrice de codes FEATURE_COLUMNS, cible 0/1) à partir du CSV
+
+    Même encodage que le dépistage par lot (batch_scoring.encode_chunk): le
+    pipeline reçoit à l'entraînement exactement ce qu'InferenceEngine lui passe.
+    """
+    df = pd.read_csv(path)
+    _, X = encode_chunk(df)
+    y = (df[TARGET] == POSITIVE_CLASS).astype(np.int8).to_numpy()
+    return X, y
+
+
+# =============================================================================
+# 🔹 PIPELINE
+# =============================================================================
+def make_pipeline(model, memory=None):
+    """Normalisation + modèle sur la matrice de codes; `memory` met en cache la normalisation"""
+    return Pipeline([
+        ('normalisation', StandardScaler()),
+        ('modele', model),
+    ], memory=memory)
+
+
+def param_grid(names):
+    """Grille GridSearchCV couvrant tous les modèles candidats demandés"""
+    grid = []
+    for name in names:
+        factory, params = CANDIDATES[name]
+        grid.append({'modele': [factory()], **{f'modele__{key}': values for key, values in params.items()}})
+    return grid
+
+
+def choose_threshold(y, probabilities):
+    """Seuil de décision maximisant le F1 (prédiction positive si probabilité > seuil)"""
+    precision, recall, thresholds = precision_recall_curve(y, probabilities)
+    f1 = 2 * precision[:-1] * recall[:-1] / np.maximum(precision[:-1] + recall[:-1], 1e-12)
+    cut = thresholds[int(np.argmax(f1))]
+    # precision_recall_curve classe positif à partir de `cut` inclus: plus grande probabilité en dessous
+    below = probabilities[probabilities < cut]
+    return float(below.max()) if len(below) else 0.0
+
+
+def evaluate(pipeline, X, y, threshold=0.5):
+    """Métriques de test au seuil de décision utilisé par InferenceEngine.predict"""
+    probabilities = pipeline.predict_proba(X)[:, list(pipeline.classes_).index(1)]
+    predictions = (probabilities > threshold).astype(np.int8)
+    return {
+        'threshold': threshold,
+        'accuracy': accuracy_score(y, predictions),
+        'precision': precision_score(y, predictions, zero_division=0),
+        'recall': recall_score(y, predictions, zero_division=0),
+        'f1': f1_score(y, predictions, zero_division=0),
+        'roc_auc': roc_auc_score(y, probabilities),
+        'confusion_matrix': confusion_matrix(y, predictions).tolist(),
+    }
+
+
+def leaderboard(search):
+    """Meilleur score de validation croisée de chaque famille de modèles"""
+    results = pd.DataFrame(search.cv_results_)
+    results['modele'] = [type(params['modele']).__name__ for params in results['params']]
+    best = results.loc[results.groupby('modele')[f'mean_test_{REFIT}'].idxmax()]
+    board = []
+    for _, row in best.sort_values(f'mean_test_{REFIT}', ascending=False).iterrows():
+        params = {key.removeprefix('modele__'): value for key, value in row['params'].items() if key != 'modele'}
+        board.append({
+            'modele': row['modele'],
+            'params': params,
+            **{metric: float(row[f'mean_test_{metric}']) for metric in SCORING},
+        })
+    return board
+
+
+# =============================================================================
+# 🔹 ENTRAÎNEMENT
+# =============================================================================
+def train(csv_path=DATA_PATH, models=tuple(CANDIDATES), output_dir=ARTIFACT_DIR,
+          cache_dir=CACHE_DIR, n_jobs=-1, cv=CV_FOLDS, min_auc=MIN_AUC, force=False):
+    """Sélectionne le meilleur pipeline, l'évalue et écrit l'artefact versionné; retourne son chemin"""
+    started = time.perf_counter()
+    X, y = load_dataset(csv_path)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, stratify=y, random_state=RANDOM_STATE)
+
+    # Les matrices encodées/normalisées de chaque pli sont calculées une fois
+    # puis réutilisées par toutes les combinaisons d'hyperparamètres
+    memory = joblib.Memory(cache_dir, verbose=0) if cache_dir else None
+    folds = StratifiedKFold(cv, shuffle=True, random_state=RANDOM_STATE)
+    search = GridSearchCV(
+        make_pipeline(LogisticRegression(), memory=memory),
+        param_grid(models),
+        scoring=list(SCORING), refit=REFIT,
+        cv=folds,
+        n_jobs=n_jobs,
+    )
+    search.fit(X_train, y_train)
+
+    pipeline = search.best_estimator_
+    pipeline.set_params(memory=None)   # l'artefact ne dépend pas du cache local
+
+    # Seuil choisi sur les prédictions hors pli du jeu d'entraînement, jamais sur le test
+    out_of_fold = cross_val_predict(clone(pipeline), X_train, y_train, cv=folds, method='predict_proba',
+                                    n_jobs=n_jobs)[:, list(pipeline.classes_).index(1)]
+    threshold = choose_threshold(y_train, out_of_fold)
+    data_hash = file_sha256(csv_path)
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{data_hash[:8]}"
+    best = {key.removeprefix('modele__'): value for key, value in search.best_params_.items() if key != 'modele'}
+    metadata = {
+        'version': version,
+        'trained_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data': {
+            'path': os.path.basename(csv_path),
+            'sha256': data_hash,
+            'rows': int(len(y)),
+            'positive_rate': float(y.mean()),
+            'train_rows': int(len(y_train)),
+            'test_rows': int(len(y_test)),
+        },
+        'features': FEATURE_COLUMNS,
+        'input': INPUT_CODES,
+        'model': type(search.best_params_['modele']).__name__,
+        'params': best,
+        'selection': {'scoring': REFIT, 'cv_folds': cv, 'random_state': RANDOM_STATE},
+        'cv': leaderboard(search),
+        'threshold': threshold,
+        'test': evaluate(pipeline, X_test, y_test, threshold),
+        'training_seconds': round(time.perf_counter() - started, 2),
+        'versions': {
+            'python': platform.python_version(),
+            'sklearn': sklearn.__version__,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+    }
+    metadata['promotion'] = promotion(metadata['test']['roc_auc'], output_dir, min_auc, force)
+    return save_artifact(pipeline, metadata, output_dir)
+
+
+def incumbent_auc(output_dir=ARTIFACT_DIR):
+    """AUC de test du modèle désigné par LATEST (None si aucun)"""
+    path = latest_artifact(output_dir)
+    if path is None:
+        return None
+    try:
+        with open(os.path.splitext(path)[0] + ".json", encoding='utf-8') as f:
+            return float(json.load(f)['test']['roc_auc'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def promotion(auc, output_dir=ARTIFACT_DIR, min_auc=MIN_AUC, force=False):
+    """Décision de mise à jour de LATEST: AUC ≥ min_auc et ≥ celle du modèle en place"""
+    incumbent = incumbent_auc(output_dir)
+    required = max(min_auc, incumbent if incumbent is not None else min_auc)
+    promoted = force or auc >= required
+    if force and auc < required:
+        reason = f"forcé (AUC {auc:.4f} < {required:.4f})"
+    elif promoted:
+        reason = f"AUC {auc:.4f} ≥ {required:.4f}"
+    else:
+        reason = f"AUC {auc:.4f} < {required:.4f} (seuil {min_auc}, modèle en place {incumbent})"
+    return {'promoted': promoted, 'reason': reason, 'min_auc': min_auc, 'incumbent_auc': incumbent}
+
+
+def save_artifact(pipeline, metadata, output_dir=ARTIFACT_DIR):
+    """Écrit tb_pipeline-<version>.joblib et sa fiche JSON, puis met à jour LATEST si le modèle est promu"""
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"tb_pipeline-{metadata['version']}"
+    path = os.path.join(output_dir, f"{name}.joblib")
+    joblib.dump({'pipeline': pipeline, 'metadata': metadata}, path, compress=3)
+    with open(os.path.join(output_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+    if not metadata.get('promotion', {}).get('promoted', True):
+        return path
+
+    # Remplacement atomique du pointeur: un processus qui démarre lit l'ancien ou le nouveau
+    latest = os.path.join(output_dir, LATEST_FILE)
+    with open(latest + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(path) + "\n")
+    os.replace(latest + ".tmp", latest)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Entraîne le pipeline de diagnostic et écrit un artefact versionné")
+    parser.add_argument("--csv", default=DATA_PATH, help="données d'entraînement au format TUBERCULOSE.CSV")
+    parser.add_argument("--output", default=ARTIFACT_DIR, help="dossier des artefacts")
+    parser.add_argument("--models", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--cv", type=int, default=CV_FOLDS, help="nombre de plis de validation croisée")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="processus parallèles (-1: tous les cœurs)")
+    parser.add_argument("--no-cache", action="store_true", help="désactive le cache joblib des transformations")
+    parser.add_argument("--min-auc", type=float, default=MIN_AUC, help="AUC de test minimale pour mettre à jour LATEST")
+    parser.add_argument("--force", action="store_true", help="met à jour LATEST quelle que soit l'AUC")
+    args = parser.parse_args(argv)
+
+    path = train(args.csv, args.models, args.output, None if args.no_cache else CACHE_DIR, args.n_jobs, args.cv,
+                 args.min_auc, args.force)
+    metadata = joblib.load(path)['metadata']
+    decision = metadata['promotion']
+    print(f"{'✅' if decision['promoted'] else '⚠️'} {path}")
+    print(f"   LATEST {'mis à jour' if decision['promoted'] else 'inchangé'}: {decision['reason']}")
+    print(f"   modèle: {metadata['model']} {metadata['params']} · seuil de décision {metadata['threshold']:.4f}")
+    for entry in metadata['cv']:
+        print(f"   cv {entry['modele']:<24} roc_auc={entry['roc_auc']:.4f} f1={entry['f1']:.4f}")
+    test = metadata['test']
+    print(f"   test: roc_auc={test['roc_auc']:.4f} f1={test['f1']:.4f} "
+          f"accuracy={test['accuracy']:.4f} ({metadata['training_seconds']} s)")
+
+
+if __name__ == "__main__":
+    main()
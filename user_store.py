@@ -0,0 +1,211 @@
+# user_store.py - Comptes utilisateurs en base: scrypt salé, cache de vérification, limitation des essais
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+# Coût scrypt (mémoire ≈ 128 * n * r octets), réglable par variables d'environnement
+SCRYPT_N = int(os.environ.get("TB_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("TB_SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("TB_SCRYPT_P", 1))
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Cache des identifiants déjà vérifiés (évite de recalculer scrypt à chaque rerun)
+VERIFIED_CACHE_SIZE = 256
+VERIFIED_CACHE_TTL = int(os.environ.get("TB_AUTH_CACHE_TTL", 300))  # secondes
+
+# Limitation des tentatives de connexion par nom d'utilisateur
+MAX_ATTEMPTS = int(os.environ.get("TB_LOGIN_MAX_ATTEMPTS", 5))
+ATTEMPT_WINDOW = int(os.environ.get("TB_LOGIN_WINDOW", 300))  # secondes
+MAX_TRACKED_USERS = 10000
+
+MIN_PASSWORD_LENGTH = 4
+
+
+class LoginRateLimited(Exception):
+    """Trop de tentatives de connexion récentes pour ce compte"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Trop de tentatives, réessayez dans {int(retry_after) + 1} s")
+        self.retry_after = retry_after
+
+
+# =============================================================================
+# 🔹 HACHAGE
+# =============================================================================
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=KEY_BYTES)
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Empreinte `scrypt$n$r$p$sel$clé` (sel aléatoire par mot de passe)"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}"
+
+
+def _parse(stored):
+    scheme, n, r, p, salt, key = stored.split("$")
+    if scheme != "scrypt":
+        raise ValueError(f"Schéma de hachage inconnu: {scheme}")
+    return int(n), int(r), int(p), base64.b64decode(salt), base64.b64decode(key)
+
+
+def verify_password(password, stored):
+    """Comparaison en temps constant du mot de passe avec l'empreinte stockée"""
+    try:
+        n, r, p, salt, key = _parse(stored)
+    except ValueError:
+        return False
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), key)
+
+
+def needs_rehash(stored, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Vrai si l'empreinte a été calculée avec un autre coût que le coût courant"""
+    try:
+        return _parse(stored)[:3] != (n, r, p)
+    except ValueError:
+        return True
+
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash():
+    """Empreinte factice: un nom inconnu coûte autant qu'un mauvais mot de passe (calculée au premier usage)"""
+    return hash_password(secrets.token_hex(8))
+
+
+# =============================================================================
+# 🔹 STOCKAGE
+# =============================================================================
+def insert_user(conn, username, password, role, name):
+    conn.execute(
+        text("INSERT INTO users (username, password_hash, role, name) VALUES (:username, :hash, :role, :name)"),
+        {"username": username, "hash": hash_password(password), "role": role, "name": name},
+    )
+
+
+class UserStore:
+    """Comptes partagés par toutes les sessions et toutes les instances de l'application
+
+    `authenticate` ne recalcule scrypt que si le couple (utilisateur, mot de
+    passe) n'a pas été vérifié dans les `VERIFIED_CACHE_TTL` dernières secondes;
+    le cache ne contient qu'un HMAC du mot de passe sous une clé propre au
+    processus. Au-delà de `MAX_ATTEMPTS` échecs en `ATTEMPT_WINDOW` secondes,
+    le compte est temporairement bloqué (compteur local à chaque instance).
+    """
+
+    def __init__(self, engine):
+        # Moteur SQLAlchemy, ou fonction retournant le moteur actif
+        self.engine = engine
+        self._cache_key = secrets.token_bytes(32)
+        self._verified = OrderedDict()
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _engine(self):
+        return self.engine() if callable(self.engine) else self.engine
+
+    # -------------------------------------------------------------------------
+    def get_user(self, username):
+        """Profil (username, role, name) et empreinte, ou None"""
+        with self._engine().connect() as conn:
+            row = conn.execute(
+                text("SELECT username, password_hash, role, name FROM users WHERE username = :username"),
+                {"username": username},
+            ).mappings().first()
+        return dict(row) if row else None
+
+    def create_user(self, username, password, role, name):
+        """Crée un compte; ValueError si le nom existe déjà ou si le mot de passe est trop court"""
+        if len(password) < MIN_PASSWORD_LENGTH:
+            raise ValueError(f"Le mot de passe doit avoir au moins {MIN_PASSWORD_LENGTH} caractères")
+        try:
+            with self._engine().begin() as conn:
+                insert_user(conn, username, password, role, name)
+        except IntegrityError:
+            raise ValueError("Ce nom d'utilisateur existe déjà")
+
+    def authenticate(self, username, password):
+        """Profil de l'utilisateur si le mot de passe est correct, None sinon
+
+        Lève LoginRateLimited si le compte a trop d'échecs récents.
+        """
+        self._check_rate(username)
+        user = self.get_user(username)
+        stored = user['password_hash'] if user else _dummy_hash()
+
+        if user and self._is_verified(username, password, stored):
+            return self._profile(user)
+
+        if not verify_password(password, stored) or user is None:
+            self._record_failure(username)
+            return None
+
+        with self._lock:
+            self._failures.pop(username, None)
+        if needs_rehash(stored):
+            stored = self._rehash(username, password)
+        self._remember(username, password, stored)
+        return self._profile(user)
+
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def _profile(user):
+        return {'username': user['username'], 'role': user['role'], 'name': user['name']}
+
+    def _rehash(self, username, password):
+        stored = hash_password(password)
+        with self._engine().begin() as conn:
+            conn.execute(text("UPDATE users SET password_hash = :hash WHERE username = :username"),
+                         {"hash": stored, "username": username})
+        return stored
+
+    def _digest(self, username, password, stored):
+        message = "\0".join((username, password, stored)).encode("utf-8")
+        return hmac.new(self._cache_key, message, hashlib.sha256).digest()
+
+    def _is_verified(self, username, password, stored):
+        with self._lock:
+            entry = self._verified.get(username)
+        if entry is None or time.monotonic() - entry[1] > VERIFIED_CACHE_TTL:
+            return False
+        return hmac.compare_digest(entry[0], self._digest(username, password, stored))
+
+    def _remember(self, username, password, stored):
+        digest = self._digest(username, password, stored)
+        with self._lock:
+            self._verified[username] = (digest, time.monotonic())
+            self._verified.move_to_end(username)
+            while len(self._verified) > VERIFIED_CACHE_SIZE:
+                self._verified.popitem(last=False)
+
+    def _check_rate(self, username):
+        now = time.monotonic()
+        with self._lock:
+            attempts = [t for t in self._failures.get(username, []) if now - t < ATTEMPT_WINDOW]
+            if attempts:
+                self._failures[username] = attempts
+            else:
+                self._failures.pop(username, None)
+        if len(attempts) >= MAX_ATTEMPTS:
+            raise LoginRateLimited(ATTEMPT_WINDOW - (now - attempts[0]))
+
+    def _record_failure(self, username):
+        with self._lock:
+            self._failures.setdefault(username, []).append(time.monotonic())
+            self._failures.move_to_end(username)
+            while len(self._failures) > MAX_TRACKED_USERS:
+                self._failures.popitem(last=False)
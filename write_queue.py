@@ -0,0 +1,369 @@
+# write_queue.py - Écriture différée et groupée des diagnostics dans la table patients
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import DisconnectionError, OperationalError, StatementError
+
+from daily_stats import increment_daily_stats
+
+try:
+    import fcntl
+except ImportError:     # Windows: seul le verrou entre threads s'applique
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOURNAL_PATH = os.environ.get("TB_JOURNAL_PATH", os.path.join(BASE_DIR, "data", "pending_patients.jsonl"))
+
+logger = logging.getLogger(__name__)
+
+# Colonnes écrites par le formulaire de diagnostic et le dépistage par lot
+PATIENT_COLUMNS = [
+    'cin', 'nom', 'prenom', 'age', 'genre', 'poids', 'taille', 'imc',
+    'douleur_thoracique', 'intensite_toux', 'essoufflement', 'production_crachats',
+    'sang_crachats', 'fievre', 'fatigue', 'sueurs_nocturnes', 'perte_poids',
+    'tabagisme', 'antecedents_tb', 'prediction', 'probabilite', 'niveau_risque',
+    'medecin_traitant', 'date_consultation'
+]
+
+# Base indisponible: le lot est journalisé et rejoué plus tard
+TRANSIENT_ERRORS = (OperationalError, DisconnectionError)
+# Lignes refusées (IntegrityError, DataError, ProgrammingError...): réessayées une à une
+ROW_ERRORS = (StatementError, TypeError, ValueError)
+
+INSERT_PATIENT = text(
+    f"INSERT INTO patients ({', '.join(PATIENT_COLUMNS)}) "
+    f"VALUES ({', '.join(':' + col for col in PATIENT_COLUMNS)})"
+)
+
+
+@contextmanager
+def journal_lock(journal_path):
+    """Verrou exclusif (fcntl) sur un journal, partagé avec les autres processus qui l'utilisent"""
+    directory = os.path.dirname(journal_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(journal_path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def worker_journal_path(pid=None, journal_path=JOURNAL_PATH):
+    """Journal propre à un processus (workers gunicorn): pending_patients.<pid>.jsonl"""
+    root, ext = os.path.splitext(journal_path)
+    return f"{root}.{pid or os.getpid()}{ext}"
+
+
+def rejected_journal_path(journal_path=JOURNAL_PATH):
+    """Lignes refusées par la base: pending_patients.rejected.jsonl"""
+    root, ext = os.path.splitext(journal_path)
+    return f"{root}.rejected{ext}"
+
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        return True     # pas de sonde sans effet de bord: le journal n'est jamais repris
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def orphan_journals(journal_path=JOURNAL_PATH):
+    """Journaux par processus laissés par des processus arrêtés"""
+    root, ext = os.path.splitext(journal_path)
+    pattern = re.compile(re.escape(root) + r"\.(\d+)" + re.escape(ext) + r"(\.replaying)?")
+    pids = set()
+    for path in glob.glob(f"{glob.escape(root)}.*{ext}*"):
+        match = pattern.fullmatch(path)
+        if match:
+            pids.add(int(match.group(1)))
+    return [worker_journal_path(pid, journal_path) for pid in sorted(pids) if not _process_alive(pid)]
+
+
+def _error_line(error):
+    """Première ligne du message (sans la requête ni les paramètres: données patients)"""
+    return str(error).split("\n", 1)[0]
+
+
+def _read_rows(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def insert_patients(conn, rows):
+    """INSERT préparé exécuté en executemany sur une liste de dictionnaires
+
+    Les agrégats daily_stats sont mis à jour dans la même transaction.
+    """
+    if rows:
+        conn.execute(INSERT_PATIENT, [{col: row.get(col) for col in PATIENT_COLUMNS} for row in rows])
+        increment_daily_stats(conn, rows)
+
+
+class PatientWriteQueue:
+    """File d'écriture: les diagnostics sont regroupés puis insérés en une transaction
+
+    Un lot part dès qu'il atteint `max_batch` lignes ou `flush_interval` secondes
+    après sa première ligne. Si la base est indisponible, le lot est ajouté au
+    journal local `journal_path` et rejoué au lot suivant: le journal est d'abord
+    renommé en `.replaying` sous verrou fcntl, les lignes ajoutées pendant le
+    rejeu vont donc dans un nouveau journal. Si la base refuse le lot, les lignes
+    sont réessayées une à une et celles qui échouent encore vont dans
+    `rejected_path` au lieu de bloquer les lots suivants.
+    """
+
+    def __init__(self, engine, max_batch=100, flush_interval=1.0, journal_path=JOURNAL_PATH, on_flush=None,
+                 rejected_path=None):
+        # Moteur SQLAlchemy, ou fonction retournant le moteur actif
+        self.engine = engine
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.rejected_path = rejected_path or rejected_journal_path(journal_path)
+        self.on_flush = on_flush
+
+        self._queue = queue.Queue()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'batches': 0,
+            'rows_written': 0,
+            'rows_journaled': 0,
+            'rows_rejected': 0,
+            'errors': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0,
+            'last_error': None,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="patient-write-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -------------------------------------------------------------------------
+    def submit(self, patient_data):
+        """Met un diagnostic en file; retourne immédiatement"""
+        self._queue.put(dict(patient_data))
+
+    def flush(self):
+        """Écrit immédiatement tout ce qui est en file (et le journal en attente)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+
+    def close(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join(timeout=self.flush_interval * 2)
+            self.flush()
+
+    def adopt_journal(self, path):
+        """Reprend dans ce journal les diagnostics en attente d'un autre journal (processus arrêté)"""
+        with journal_lock(path):
+            rows = _read_rows(path + ".replaying") + _read_rows(path)
+            if rows:
+                with self._flush_lock, self._journal_lock():
+                    self._append_journal(rows)
+            for orphan in (path + ".replaying", path):
+                if os.path.exists(orphan):
+                    os.remove(orphan)
+        if os.path.exists(path + ".lock"):
+            os.remove(path + ".lock")
+        return len(rows)
+
+    def metrics(self):
+        """Profondeur de file et latences d'écriture"""
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['journal_pending'] = self._journal_rows()
+        metrics['avg_flush_ms'] = metrics['total_flush_ms'] / metrics['batches'] if metrics['batches'] else 0.0
+        return metrics
+
+    # -------------------------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch or self._journal_size():
+                self._write(batch)
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self._flush_lock, self._journal_lock():
+            pending = self._read_journal()
+            rows = pending + batch
+            if not rows:
+                return
+
+            start = time.perf_counter()
+            engine = None
+            try:
+                engine = self.engine() if callable(self.engine) else self.engine
+                with engine.begin() as conn:
+                    insert_patients(conn, rows)
+                written, rejected, remaining = len(rows), [], []
+            except ROW_ERRORS as e:
+                if engine is None or isinstance(e, TRANSIENT_ERRORS):
+                    self._journal_batch(batch, e)
+                    return
+                logger.warning("Lot refusé par la base, écriture ligne par ligne: %s", _error_line(e))
+                with self._metrics_lock:
+                    self._metrics['errors'] += 1
+                    self._metrics['last_error'] = _error_line(e)
+                written, rejected, remaining = self._write_each(engine, rows)
+            except Exception as e:
+                self._journal_batch(batch, e)
+                return
+
+            if remaining:
+                self._append_journal(remaining)
+            if rejected:
+                self._reject(rejected)
+            if pending:
+                self._clear_journal()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._metrics_lock:
+                self._metrics['batches'] += 1
+                self._metrics['rows_written'] += written
+                self._metrics['rows_rejected'] += len(rejected)
+                self._metrics['last_flush_ms'] = elapsed_ms
+                self._metrics['max_flush_ms'] = max(self._metrics['max_flush_ms'], elapsed_ms)
+                self._metrics['total_flush_ms'] += elapsed_ms
+
+        if self.on_flush:
+            try:
+                self.on_flush()
+            except Exception as e:
+                logger.exception("Échec du rappel on_flush de la file d'écriture")
+                with self._metrics_lock:
+                    self._metrics['last_error'] = f"on_flush: {e}"
+
+    def _journal_batch(self, batch, error):
+        """Base indisponible: le lot attend le rejeu suivant (journal déjà verrouillé)"""
+        if batch:
+            self._append_journal(batch)
+        with self._metrics_lock:
+            self._metrics['errors'] += 1
+            self._metrics['rows_journaled'] += len(batch)
+            self._metrics['last_error'] = str(error)
+
+    def _write_each(self, engine, rows):
+        """Une transaction par ligne: (écrites, [(ligne, erreur)] refusées, restantes si la base tombe)"""
+        written, rejected = 0, []
+        for i, row in enumerate(rows):
+            try:
+                with engine.begin() as conn:
+                    insert_patients(conn, [row])
+            except TRANSIENT_ERRORS:
+                return written, rejected, rows[i:]
+            except ROW_ERRORS as e:
+                rejected.append((row, e))
+            else:
+                written += 1
+        return written, rejected, []
+
+    def _reject(self, rejected):
+        """Ajoute les lignes refusées au fichier des rejets, avec l'erreur, pour reprise manuelle"""
+        logger.error("%d diagnostic(s) refusé(s) par la base, voir %s", len(rejected), self.rejected_path)
+        now = datetime.now().isoformat(timespec='seconds')
+        with journal_lock(self.rejected_path), open(self.rejected_path, "a", encoding="utf-8") as f:
+            for row, error in rejected:
+                entry = {'row': row, 'error': _error_line(error), 'rejected_at': now}
+                f.write(json.dumps(entry, default=str, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # -------------------------------------------------------------------------
+    # Journal local (une ligne JSON par diagnostic)
+    @property
+    def _replaying_path(self):
+        return self.journal_path + ".replaying"
+
+    def _journal_lock(self):
+        return journal_lock(self.journal_path)
+
+    def _journal_size(self):
+        """Octets en attente (journal et rejeu interrompu)"""
+        size = 0
+        for path in (self.journal_path, self._replaying_path):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _journal_rows(self):
+        """Diagnostics en attente dans le journal"""
+        rows = 0
+        for path in (self.journal_path, self._replaying_path):
+            try:
+                with open(path, "rb") as f:
+                    rows += sum(1 for line in f if line.strip())
+            except OSError:
+                pass
+        return rows
+
+    def _append_journal(self, rows):
+        """Ajoute des lignes au journal (verrou du journal déjà pris)"""
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_journal(self):
+        """Renomme le journal en .replaying puis le lit (verrou du journal déjà pris)
+
+        Un .replaying restant d'un rejeu échoué est relu tel quel; le journal
+        courant attend alors le rejeu suivant.
+        """
+        if not os.path.exists(self._replaying_path):
+            if not os.path.exists(self.journal_path):
+                return []
+            os.replace(self.journal_path, self._replaying_path)
+        return _read_rows(self._replaying_path)
+
+    def _clear_journal(self):
+        os.remove(self._replaying_path)